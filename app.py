@@ -1,15 +1,19 @@
 # Apply eventlet monkey patching at the very start
 import eventlet
 eventlet.monkey_patch()
+from eventlet import tpool
 
 from flask import Flask, render_template, jsonify, request, redirect, url_for, send_file, session, send_from_directory
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
 from flask_socketio import SocketIO, emit
 from flask_wtf.csrf import CSRFProtect
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
 from apscheduler.schedulers.background import BackgroundScheduler
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import yt_dlp
 import pygame
 import os
@@ -18,14 +22,27 @@ import subprocess
 import sys
 import logging
 import shutil
+import sqlite3
 import re
 import secrets
 from werkzeug.utils import secure_filename
 import mutagen
-from mutagen.mp3 import MP3
-import glob
+import numpy as np
+import bisect
+import heapq
+import importlib
+import io
+import random
+import threading
+import time
+from collections import namedtuple
 from contextlib import contextmanager
 
+from helpers import (
+    CROSSFADE_DECODE_MARGIN, MIXER_CHANNELS, MIXER_FREQUENCY, SQLITE_PROFILES, SQLITE_TIMEOUT,
+    decode_pcm, download_options, mix_crossfade, resolve_track_info
+)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -39,9 +56,48 @@ logging.getLogger('apscheduler').setLevel(logging.WARNING)
 # Constants
 ALLOWED_EXTENSIONS = {'mp3', 'wav', 'ogg', 'flac', 'aac', 'm4a'}
 DEFAULT_VOLUME = 0.5
-BROADCAST_INTERVAL = 0.5
+PLAYBACK_POLL_INTERVAL = 1.0  # How often to check for song end while playing (local call, no DB/emit)
+PLAYBACK_HEARTBEAT_INTERVAL = 15  # Position resync while playing, only if clients are connected
+PLAYBACK_IDLE_HEARTBEAT_INTERVAL = 300  # State resync while idle, only if clients are connected
+FADE_TICK = 0.02  # Seconds between volume updates while a fade runs
+MIXER_BUFFER = 4096  # Frames per audio callback; larger buffers prevent ALSA underruns
+CROSSFADE_CANCEL_MS = 50  # A cancelled crossfade is faded out this quickly instead of cut
+CROSSFADE_HANDOFF_BUFFERS = 4  # Music stream and overlap buffer cross over this many callbacks, so the handoff does not click
 UPDATE_YTDLP_HOUR = 1
 MAX_UPLOAD_SIZE = 150 * 1024 * 1024  # 150MB
+POSITION_GAP = 1024  # Spacing between Song.position keys so moves touch a single row
+POSITION_MAX = 2 ** 52  # Compact before keys leave the range JavaScript numbers represent exactly
+COMPACT_POSITIONS_HOUR = 3
+PRELOAD_LEAD_SECONDS = 30  # Preload the next scheduled track this long before it fires
+PRELOAD_MAX_BYTES = 16 * 1024 * 1024  # About 11 minutes of 192kbps MP3; larger files only get the page cache warmed
+EVENT_LOOP_PROBE_INTERVAL = 0.1  # Seconds between event loop stall probes
+EVENT_LOOP_STALL_WARN = 0.25  # Log stalls longer than this (seconds)
+SONG_PAGE_SIZE = 100  # Songs per /api/songs page (and in /api/initial-state)
+SONG_PAGE_MAX = 500
+STATS_REFRESH_INTERVAL = 300  # Seconds between background refreshes of the stats snapshot
+STATS_MAX_AGE = 60  # Older snapshots are still served, but trigger a background refresh
+STREAM_MAX_AGE = 3600  # Browser cache lifetime for /stream responses (revalidated by ETag afterwards)
+STREAM_BLOCK_SIZE = 64 * 1024
+# /stream/<id>?profile=... renditions for listeners on weak links
+TRANSCODE_PROFILES = {
+    'low': {'ext': 'ogg', 'mimetype': 'audio/ogg', 'args': ['-c:a', 'libopus', '-b:a', '48k', '-f', 'ogg']},
+    'low-aac': {'ext': 'aac', 'mimetype': 'audio/aac', 'args': ['-c:a', 'aac', '-b:a', '64k', '-f', 'adts']}
+}
+TRANSCODE_STALE_PART_SECONDS = 3600  # Unfinished renditions older than this are left-overs
+DURATION_BACKFILL_BATCH = 50  # Songs probed per batch by the duration backfill
+FFPROBE_TIMEOUT = 30
+SELECTION_MODES = ('playlist', 'shuffle', 'weighted')
+WEIGHTED_COOLDOWN_HOURS = 6  # Weighted mode: a song just played recovers its full weight over this long
+WEIGHTED_RECENT_FACTOR = 0.05  # ...starting from this fraction of its priority weight
+WEIGHTED_RECOVERY_STEPS = 12  # ...in this many equal steps (every 30 minutes), each a single tree update
+LOUDNESS_TARGET_LUFS = -18.0  # ReplayGain 2.0 reference level
+LOUDNESS_GAIN_LIMIT_DB = 12.0  # Per-song gain is clamped to +/- this
+LOUDNESS_WORKERS = 1  # Analysis processes run at once
+LOUDNESS_NICE = 19  # Analysis processes (and their ffmpeg) run at the lowest CPU priority
+LOUDNESS_PLAYING_PAUSE = 5.0  # Seconds between analyses while music is playing
+LOUDNESS_BATCH = 50
+LOUDNESS_TIMEOUT = 600
+SCHEDULER_THREADS = 10  # APScheduler's default thread pool size
 
 # Global download state
 download_state = {
@@ -67,13 +123,43 @@ app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_SIZE # Limit upload size to preven
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax' # Adjust as needed for your frontend setup (e.g., 'None' for cross-origin)
 app.config['SESSION_COOKIE_SECURE'] = False # Set to True if using HTTPS
 app.config['REMEMBER_COOKIE_DURATION'] = 365 * 24 * 3600  # 1 year
+app.config['DOWNLOAD_WORKERS'] = int(os.environ.get('DOWNLOAD_WORKERS', 3))  # Playlist tracks downloaded/transcoded in parallel
+app.config['TRANSCODE_CACHE_MAX_BYTES'] = int(os.environ.get('TRANSCODE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+app.config['SHUFFLE_STATE_FILE'] = os.environ.get('SHUFFLE_STATE_FILE', '')  # Optional JSON copy of the shuffle bags
+app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE', 'tuned')
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    # Scheduler jobs, the download worker and its playlist pool, plus request handlers
+    'pool_size': int(os.environ.get('DB_POOL_SIZE', SCHEDULER_THREADS + app.config['DOWNLOAD_WORKERS'] + 2)),
+    'max_overflow': 10,
+    'pool_timeout': 30,
+    'pool_pre_ping': False,  # Local file; nothing to go stale
+    'connect_args': {'timeout': SQLITE_TIMEOUT}
+}
 
 socketio = SocketIO(app, async_mode='eventlet', cors_allowed_origins='*', message_queue=None)
 db = SQLAlchemy(app)
 
+@event.listens_for(Engine, 'connect')
+def apply_sqlite_profile(dbapi_connection, connection_record):
+    """Apply the configured SQLITE_PROFILES pragmas to each new connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    pragmas = SQLITE_PROFILES.get(app.config['SQLITE_PROFILE'])
+    if pragmas is None:
+        logger.warning(f"Unknown SQLITE_PROFILE {app.config['SQLITE_PROFILE']!r}, using SQLite defaults")
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
 # Get absolute path for the project directory
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 MUSIC_DIR = os.path.join(BASE_DIR, app.config['UPLOAD_FOLDER'])
+TRANSCODE_CACHE_DIR = os.path.join(BASE_DIR, 'transcode_cache')
+LOUDNESS_SCRIPT = os.path.join(BASE_DIR, 'loudness.py')
 
 # Function to get disk usage information
 def get_disk_usage():
@@ -105,9 +191,93 @@ def get_disk_usage():
             'percentage_used': 0
         }
 
+def get_library_bytes():
+    """Total size of the files in the music folder"""
+    total = 0
+    with os.scandir(MUSIC_DIR) as it:
+        for entry in it:
+            if entry.is_file():
+                total += entry.stat().st_size
+    return total
+
+def collect_system_stats():
+    """Refresh the cached stats snapshot: disk usage, library size, per-category counts and duration"""
+    global system_stats, stats_refresh_pending
+    try:
+        disk = run_blocking(get_disk_usage)
+
+        try:
+            library_bytes = run_blocking(get_library_bytes)
+        except Exception as e:
+            logger.error(f"Error measuring music library size: {e}")
+            library_bytes = 0
+
+        categories = {}
+        try:
+            with app.app_context():
+                with session_scope() as session:
+                    rows = session.query(
+                        Song.category,
+                        db.func.count(Song.id),
+                        db.func.coalesce(db.func.sum(Song.duration), 0)
+                    ).group_by(Song.category).all()
+            for category, count, duration in rows:
+                bucket = categories.setdefault(category or 'music', {'songs': 0, 'duration': 0})
+                bucket['songs'] += count
+                bucket['duration'] += int(duration)
+        except Exception as e:
+            logger.error(f"Error counting library songs: {e}")
+
+        system_stats = {
+            'disk': disk,
+            'library': {
+                'bytes': library_bytes,
+                'songs': sum(c['songs'] for c in categories.values()),
+                'duration': sum(c['duration'] for c in categories.values()),
+                'categories': categories
+            },
+            'updated_at': time.time()
+        }
+    finally:
+        stats_refresh_pending = False
+    return system_stats
+
+def request_stats_refresh():
+    """Refresh the stats snapshot off the request path, e.g. after a library change"""
+    global stats_refresh_pending
+    if not stats_refresh_pending:
+        stats_refresh_pending = True
+        socketio.start_background_task(collect_system_stats)
+
+def get_system_stats():
+    """Cached stats snapshot, collected on first use and refreshed once older than STATS_MAX_AGE"""
+    snapshot = system_stats
+    if snapshot is None:
+        return collect_system_stats()
+    if time.time() - snapshot['updated_at'] > STATS_MAX_AGE:
+        request_stats_refresh()
+    return snapshot
+
+def format_disk_usage(stats):
+    """Disk usage payload the dashboard expects, from a stats snapshot"""
+    disk = stats['disk']
+    library_bytes = stats['library']['bytes']
+    return {
+        'used': disk.get('used_gb', 0) * 1024 * 1024 * 1024,
+        'total': disk.get('total_gb', 0) * 1024 * 1024 * 1024,
+        'percent': disk.get('percentage_used', 0),
+        'used_formatted': f"{disk.get('used_gb', 0):.2f} GB",
+        'total_formatted': f"{disk.get('total_gb', 0):.2f} GB",
+        'library_bytes': library_bytes,
+        'library_formatted': f"{library_bytes / (1024 ** 3):.2f} GB"
+    }
+
 # Initialize pygame mixer for audio playback with larger buffer to prevent ALSA underrun
-pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=4096)
+pygame.mixer.init(frequency=MIXER_FREQUENCY, size=-16, channels=MIXER_CHANNELS, buffer=MIXER_BUFFER)
+logger.info(f"Mixer opened as (frequency, size, channels) = {pygame.mixer.get_init()}")
 pygame.mixer.music.set_volume(DEFAULT_VOLUME)
+pygame.mixer.set_reserved(1)
+crossfade_channel = pygame.mixer.Channel(0)  # Plays the mixed overlap of two tracks
 
 # Initialize scheduler
 scheduler = None
@@ -166,8 +336,10 @@ def init_scheduler():
     if scheduler is None:
         scheduler = BackgroundScheduler()
         scheduler.start()
-        scheduler.add_job(safe_broadcast, 'interval', seconds=BROADCAST_INTERVAL, id='broadcast_playback')
         scheduler.add_job(update_ytdlp, 'cron', hour=UPDATE_YTDLP_HOUR, id='update_ytdlp')
+        scheduler.add_job(compact_song_positions_if_needed, 'cron', hour=COMPACT_POSITIONS_HOUR, id='compact_positions')
+        scheduler.add_job(collect_system_stats, 'interval', seconds=STATS_REFRESH_INTERVAL, id='refresh_stats')
+    start_playback_monitor()
 
 def init_admin_user():
     """Initialize the admin user if not exists"""
@@ -235,9 +407,75 @@ is_playing = False
 volume = DEFAULT_VOLUME
 current_position = 0
 seek_offset = 0  # Track the offset when seeking
-shuffle_mode = False  # Shuffle mode for random playback
+selection_mode = 'playlist'  # How play_next_song picks: one of SELECTION_MODES
 fade_enabled = True  # Enable fade in/out effect
 fade_duration = 2.0  # Fade duration in seconds
+crossfade_enabled = False  # With fades on, overlap consecutive tracks instead of fading through silence
+
+# Shuffle bags: bag key ('music', 'announcement' or 'all') -> {'order', 'index', 'cursor', 'last'}.
+# order[:cursor] already played this cycle, order[cursor:] still to come; index maps id -> slot.
+shuffle_bags = {}
+
+# Weighted mode: bag key -> WeightedSongIndex, built on first use
+weighted_indexes = {}
+
+# Immutable snapshot of the song loaded in the mixer, so hot paths never touch the DB
+NowPlaying = namedtuple('NowPlaying', ['id', 'title', 'duration', 'category', 'delete_after_play', 'file_path', 'gain'])
+now_playing = None
+
+position_compaction_pending = False
+
+# Normalized relative path -> actual relative path for files under MUSIC_DIR
+file_index = {}
+
+# Event loop responsiveness, measured by event_loop_probe()
+event_loop_stats = {
+    'max_stall_ms': 0.0,
+    'recent_max_stall_ms': 0.0,  # Worst stall over the current and previous minute
+    'stalls_over_warn': 0,
+    'samples': 0,
+    'since': None
+}
+event_loop_probe_started = False
+
+stream_paths = {}  # song id -> absolute file path, so /stream skips the DB and directory lookup
+
+ytdlp_version = None  # Cached by get_ytdlp_version(), refreshed after update_ytdlp()
+
+system_stats = None  # Snapshot from collect_system_stats(); see get_system_stats()
+stats_refresh_pending = False
+
+# job_id -> (hour, minute, days, args) currently registered, for diffing against the DB
+scheduled_job_specs = {}
+
+# Upcoming fires: sorted [(next_run_time, schedule_id)] plus schedule_id -> (next_run_time, info)
+schedule_timeline = []
+schedule_timeline_entries = {}
+
+# Next scheduled track, resolved and read into memory ahead of its cron trigger
+preloaded_track = None  # {'song_id', 'file_path', 'mtime', 'data'}
+current_music_buffer = None  # Keeps the BytesIO pygame is streaming from alive
+
+# Download job queue worker
+download_job_wakeup = threading.Event()
+download_worker_started = False
+
+# Loudness analysis worker
+loudness_wakeup = threading.Event()
+loudness_worker_started = False
+loudness_failed = set()  # Song ids whose analysis failed; retried after a restart, not on every wakeup
+
+# Event-driven playback broadcast state
+playback_wakeup = threading.Event()  # Set on every playback transition to wake the monitor
+playback_monitor_started = False
+connected_clients = 0
+
+# Volume envelope applied by fade_engine(): {'start', 'duration', 'from', 'to', 'then'}
+fade_envelope = None
+fade_wakeup = threading.Event()
+fade_engine_started = False
+pending_track = None  # Song id waiting on a fade-out (or a load) to reach the mixer
+last_playback_broadcast = 0.0
 
 @contextmanager
 def session_scope():
@@ -253,112 +491,428 @@ def session_scope():
     finally:
         session.close()
 
+def set_now_playing(song, file_path):
+    """Capture an immutable now-playing record for the song just loaded"""
+    global now_playing
+    now_playing = NowPlaying(
+        id=song.id,
+        title=song.title,
+        duration=song.duration or 0,
+        category=song.category or 'music',
+        delete_after_play=bool(song.delete_after_play),
+        file_path=file_path,
+        gain=10 ** ((song.loudness_gain or 0) / 20)  # Linear factor on the user's volume
+    )
+
+def update_now_playing(song_id, **changes):
+    """Replace fields of the now-playing record if it refers to song_id"""
+    global now_playing
+    record = now_playing
+    if record and record.id == song_id:
+        now_playing = record._replace(**changes)
+
+def clear_now_playing(song_id=None):
+    """Drop the now-playing record (optionally only if it refers to song_id)"""
+    global now_playing
+    if song_id is None or (now_playing and now_playing.id == song_id):
+        now_playing = None
+
+def get_now_playing_title():
+    """Title of the current song without touching the DB"""
+    record = now_playing
+    if record and record.id == current_song_id:
+        return record.title
+    return None
+
+def get_playback_position():
+    """Return the current position in seconds, refreshed from pygame while playing"""
+    global current_position
+    if pending_track is not None:
+        # The music stream still holds the outgoing track (or nothing yet); its
+        # get_pos() says nothing about the song now in current_song_id
+        current_position = seek_offset
+        return current_position
+    if pygame.mixer.music.get_busy() and current_song_id:
+        pos = pygame.mixer.music.get_pos()
+        if pos >= 0:
+            # Add seek_offset to get actual position in the song
+            current_position = (pos / 1000) + seek_offset
+    return current_position
+
+def check_song_finished():
+    """Detect the end of the current song and handle delete-after-play"""
+    global current_position, current_song_id, current_song_duration, is_playing
+    if pygame.mixer.music.get_busy() or not is_playing or not current_song_id or pending_track is not None:
+        return False
+
+    logger.info(f"Song finished playing: {current_song_id}")
+    finished = now_playing
+    current_position = 0
+    current_song_id = None
+    current_song_duration = 0
+    is_playing = False
+    clear_now_playing()
+
+    # Check if song should be deleted after playing (only touches the DB when it must)
+    deleted_song_id = None
+    song_counts = None
+    if finished and finished.delete_after_play:
+        try:
+            with app.app_context():
+                with session_scope() as session:
+                    song = session.get(Song, finished.id)
+                    if song:
+                        logger.info(f"Deleting song after play: {song.title}")
+                        deleted_song_id = song.id
+                        if os.path.exists(finished.file_path):
+                            os.remove(finished.file_path)
+                        unindex_music_file(finished.file_path)
+                        session.delete(song)
+                        song_counts = get_song_counts(session)
+            if deleted_song_id:
+                # After the commit, so selection state and the refresh match the DB
+                notify_song_removed(deleted_song_id)
+                request_stats_refresh()
+        except Exception as e:
+            logger.error(f"Error deleting song after play: {e}")
+
+    # Emit song finished event
+    socketio.emit('song_finished', {
+        'message': 'Song playback completed',
+        'deleted_song_id': deleted_song_id,
+        'counts': song_counts
+    })
+    broadcast_playback_state()
+    return True
+
+def get_playback_state():
+    """Build the playback_update payload from in-memory state"""
+    music_busy = pygame.mixer.music.get_busy() or crossfade_channel.get_busy()
+    position = get_playback_position()
+    current_title = get_now_playing_title()
+
+    return {
+        'position': position,
+        'duration': current_song_duration,
+        'is_playing': music_busy,
+        'volume': int(volume * 100),
+        'current_song_id': current_song_id,
+        'current_song_title': current_title
+    }
+
 def broadcast_playback_state():
-    """Broadcast current playback state to all clients"""
-    try:
-        global current_position, current_song_id, current_song_duration, is_playing, seek_offset
-        
-        music_busy = pygame.mixer.music.get_busy()
-        
-        if music_busy and current_song_id:
-            pos = pygame.mixer.music.get_pos()
-            if pos >= 0:
-                # Add seek_offset to get actual position in the song
-                current_position = (pos / 1000) + seek_offset
-        elif not music_busy and is_playing and current_song_id:
-            # Song has finished playing
-            logger.info(f"Song finished playing: {current_song_id}")
-            finished_song_id = current_song_id
-            current_position = 0
-            current_song_id = None
-            current_song_duration = 0
-            is_playing = False
-            
-            # Check if song should be deleted after playing
-            deleted_song_id = None
-            try:
-                with app.app_context():
-                    with session_scope() as session:
-                        song = session.get(Song, finished_song_id)
-                        if song and song.delete_after_play:
-                            logger.info(f"Deleting song after play: {song.title}")
-                            deleted_song_id = song.id
-                            actual_filename = find_actual_file(song.filename)
-                            filepath = os.path.join(BASE_DIR, actual_filename)
-                            if os.path.exists(filepath):
-                                os.remove(filepath)
-                            session.delete(song)
-            except Exception as e:
-                logger.error(f"Error deleting song after play: {e}")
-            
-            # Emit song finished event
-            socketio.emit('song_finished', {
-                'message': 'Song playback completed',
-                'deleted_song_id': deleted_song_id
-            })
+    """Broadcast current playback state to all clients.
 
-        # Get current song title
-        current_title = None
-        if current_song_id:
-            try:
-                with app.app_context():
-                    with session_scope() as session:
-                        song = session.get(Song, current_song_id)
-                        if song:
-                            current_title = song.title
-            except Exception as e:
-                logger.error(f"Error getting song title: {e}")
-        
-        socketio.emit('playback_update', {
-            'position': current_position,
-            'duration': current_song_duration,
-            'is_playing': music_busy,
-            'volume': int(volume * 100),
-            'current_song_id': current_song_id,
-            'current_song_title': current_title
-        })
+    Clients interpolate the position locally while is_playing is true, so this
+    only needs to run on state transitions and the occasional heartbeat.
+    """
+    global last_playback_broadcast
+    try:
+        state = get_playback_state()
+        last_playback_broadcast = time.monotonic()
+        socketio.emit('playback_update', state)
     except Exception as e:
         logger.error(f"Error in broadcast_playback_state: {e}")
 
-def safe_broadcast():
-    socketio.start_background_task(broadcast_playback_state)
+def notify_playback_changed():
+    """Broadcast a playback transition (play/pause/seek/stop/volume) and wake the monitor"""
+    broadcast_playback_state()
+    playback_wakeup.set()
 
+def playback_monitor():
+    """Detect song end and send adaptive heartbeats.
 
-def fade_in():
-    """Gradually increase volume from 0 to target volume"""
-    global volume
+    Transitions are broadcast by the code that causes them. This loop polls
+    pygame (no DB, no emit) only while a song is playing, resyncs connected
+    clients on a heartbeat, and sleeps until woken when idle with no clients.
+    """
+    while True:
+        try:
+            if is_playing:
+                check_song_finished()
+
+            heartbeat = PLAYBACK_HEARTBEAT_INTERVAL if is_playing else PLAYBACK_IDLE_HEARTBEAT_INTERVAL
+            if connected_clients > 0 and time.monotonic() - last_playback_broadcast >= heartbeat:
+                broadcast_playback_state()
+
+            if is_playing:
+                timeout = PLAYBACK_POLL_INTERVAL
+            elif connected_clients > 0:
+                timeout = PLAYBACK_IDLE_HEARTBEAT_INTERVAL
+            else:
+                timeout = None  # Nothing can change until a transition wakes us
+
+            playback_wakeup.wait(timeout)
+            playback_wakeup.clear()
+        except Exception as e:
+            logger.error(f"Error in playback_monitor: {e}")
+            eventlet.sleep(PLAYBACK_POLL_INTERVAL)
+
+def start_playback_monitor():
+    """Start the playback monitor background task once"""
+    global playback_monitor_started
+    if not playback_monitor_started:
+        playback_monitor_started = True
+        socketio.start_background_task(playback_monitor)
+
+
+def start_fade_engine():
+    """Start the fade engine background task once"""
+    global fade_engine_started
+    if not fade_engine_started:
+        fade_engine_started = True
+        socketio.start_background_task(fade_engine)
+
+
+def start_fade(target, duration, then=None):
+    """Ramp the music volume from its current level to target over duration seconds.
+
+    Returns at once; fade_engine() applies the ramp. A fade already running is
+    replaced from wherever it had got to (its then is dropped). then() runs on
+    the engine task when the ramp completes.
+    """
+    global fade_envelope
+    cancel_fade(restore=False)
+    fade_envelope = {
+        'start': time.monotonic(),
+        'duration': max(0.0, float(duration)),
+        'from': pygame.mixer.music.get_volume(),
+        'to': target,
+        'then': then
+    }
+    start_fade_engine()
+    fade_wakeup.set()
+
+
+def cancel_fade(restore=True):
+    """Drop any fade in progress, and a track switch waiting on it"""
+    global fade_envelope, pending_track
+    fade_envelope = None
+    pending_track = None
+    if restore:
+        pygame.mixer.music.set_volume(song_volume())
+
+
+def cancel_crossfade():
+    """Fade out a crossfade overlap that is playing, for a stop, seek, delete or new track"""
+    if crossfade_channel.get_busy():
+        crossfade_channel.fadeout(CROSSFADE_CANCEL_MS)
+
+
+def complete_fade():
+    """Jump any fade in progress to its end, running what was waiting on it"""
+    global fade_envelope
+    while fade_envelope is not None:
+        envelope = fade_envelope
+        fade_envelope = None
+        pygame.mixer.music.set_volume(envelope['to'])
+        if envelope['then']:
+            envelope['then']()
+
+
+def song_volume():
+    """Mixer volume for the current song: the user's volume with its loudness gain applied"""
+    gain = now_playing.gain if now_playing else 1.0
+    return min(1.0, volume * gain)
+
+
+def set_music_volume(value):
+    """Set the music volume; a fade-in in progress is bent to land on it instead"""
+    envelope = fade_envelope
+    if envelope is None:
+        pygame.mixer.music.set_volume(value)
+    elif envelope['to'] > 0:
+        envelope['to'] = value
+    # A fade-out keeps going; whatever follows it applies the new volume
+
+
+def fade_engine():
+    """Apply the current fade envelope until it completes.
+
+    The level is computed from the monotonic clock on every tick rather than
+    stepped, so a late tick (busy hub, slow tpool load) never stretches the
+    fade or leaves it short of its target.
+    """
+    global fade_envelope
+    while True:
+        try:
+            envelope = fade_envelope
+            if envelope is None:
+                fade_wakeup.wait()
+                fade_wakeup.clear()
+                continue
+
+            elapsed = time.monotonic() - envelope['start']
+            progress = min(1.0, elapsed / envelope['duration']) if envelope['duration'] else 1.0
+            pygame.mixer.music.set_volume(envelope['from'] + (envelope['to'] - envelope['from']) * progress)
+            if progress >= 1.0:
+                fade_envelope = None
+                if envelope['then']:
+                    envelope['then']()
+                continue
+
+            fade_wakeup.wait(FADE_TICK)
+            fade_wakeup.clear()
+        except Exception as e:
+            logger.error(f"Error in fade_engine: {e}")
+            fade_envelope = None
+            pygame.mixer.music.set_volume(song_volume())
+
+
+def stop_and_restore_volume():
+    """End of a fade-out to silence"""
+    pygame.mixer.music.stop()
+    pygame.mixer.music.set_volume(song_volume())
+    logger.info("Fade out complete")
+
+
+def switch_track(song_id, file_path, preloaded_data=None):
+    """Load a track into the mixer and start it, fading in if enabled"""
+    global current_music_buffer, pending_track
+    started = False
+    try:
+        pygame.mixer.music.stop()
+        if preloaded_data:
+            # Already in memory: no disk read at trigger time
+            current_music_buffer = io.BytesIO(preloaded_data)
+            pygame.mixer.music.load(current_music_buffer, os.path.splitext(file_path)[1].lstrip('.'))
+        else:
+            current_music_buffer = None
+            run_blocking(pygame.mixer.music.load, file_path)
+            if pending_track != song_id:
+                return  # Stopped, seeked or replaced while loading
+
+        if fade_enabled:
+            pygame.mixer.music.set_volume(0)
+            pygame.mixer.music.play()
+            started = True
+            start_fade(song_volume(), fade_duration)
+        else:
+            pygame.mixer.music.set_volume(song_volume())
+            pygame.mixer.music.play()
+            started = True
+    except Exception as e:
+        logger.error(f"Error starting track {song_id}: {e}")
+    finally:
+        if pending_track == song_id:
+            pending_track = None
+        if started:
+            notify_playback_changed()  # Clients re-anchor on the track that actually started
+
+
+def get_mixer_format():
+    """(frequency, channels) the mixer device was actually opened with.
+
+    pygame may open ALSA at another rate or channel count than requested
+    (often 48kHz on a Pi); only 16-bit signed samples can be crossfaded.
+    """
+    frequency, size, channels = pygame.mixer.get_init()
+    if size != -16:
+        raise RuntimeError(f"mixer sample format {size} is not 16-bit signed")
+    return frequency, channels
+
+
+def start_crossfade(song_id, file_path, preloaded_data):
+    """Crossfade from the song now playing into song_id; returns at once.
+
+    The outgoing tail (from its current position) and the incoming head are
+    decoded and mixed off the hub, and the mixed buffer plays on the reserved
+    crossfade channel. The music stream meanwhile loads the incoming track and
+    the fade engine starts it where the buffer ends. Falls back to a plain fade
+    if either side cannot be decoded.
+    """
+    global pending_track
+    cancel_fade(restore=False)
+    cancel_crossfade()
+    pending_track = song_id
+    socketio.start_background_task(
+        run_crossfade, song_id, file_path, preloaded_data, now_playing.file_path,
+        get_playback_position(), pygame.mixer.music.get_volume(), time.monotonic()
+    )
+
+
+def run_crossfade(song_id, file_path, preloaded_data, outgoing_path, outgoing_position, outgoing_gain, requested):
+    """Background half of start_crossfade()"""
+    global current_music_buffer, pending_track, seek_offset
+    duration = fade_duration
     try:
-        steps = int(fade_duration * 20)  # 20 steps per second
-        step_volume = volume / steps
-        current_vol = 0
-        for _ in range(steps):
-            current_vol = min(current_vol + step_volume, volume)
-            pygame.mixer.music.set_volume(current_vol)
-            eventlet.sleep(0.05)  # 50ms per step
-        pygame.mixer.music.set_volume(volume)
-        logger.info(f"Fade in complete, volume: {volume}")
+        frequency, channels = get_mixer_format()
+        # Decode a little extra of the outgoing track: it keeps playing while we decode
+        tail, head = run_blocking(lambda: (
+            decode_pcm(outgoing_path, outgoing_position, duration + CROSSFADE_DECODE_MARGIN, frequency, channels),
+            decode_pcm(file_path, 0, duration, frequency, channels)
+        ))
     except Exception as e:
-        logger.error(f"Error in fade_in: {e}")
-        pygame.mixer.music.set_volume(volume)
+        logger.warning(f"Crossfade unavailable, using fade out/in: {e}")
+        if pending_track == song_id:
+            start_fade(0, fade_duration, then=lambda: switch_track(song_id, file_path, preloaded_data))
+            pending_track = song_id
+        return
+    if pending_track != song_id:
+        return  # Stopped, seeked or replaced while decoding
+    if not is_playing:
+        # Paused while decoding: switch straight to the new track, paused
+        switch_track(song_id, file_path, preloaded_data)
+        complete_fade()
+        pygame.mixer.music.pause()
+        return
 
+    skip = min(int((time.monotonic() - requested) * frequency), len(tail) - len(head))
+    mixed = run_blocking(mix_crossfade, tail[skip:skip + len(head)], head, outgoing_gain, song_volume())
+    if pending_track != song_id:
+        return
 
-def fade_out():
-    """Gradually decrease volume to 0 then stop"""
-    global volume
+    # The mixer fades the music stream a whole callback at a time, so the overlap
+    # buffer ramps in across the same few callbacks while the stream fades out
+    handoff = min(len(mixed), MIXER_BUFFER * CROSSFADE_HANDOFF_BUFFERS)
+    mixed[:handoff] = mixed[:handoff] * np.linspace(0, 1, handoff, dtype=np.float32)[:, None]
+
+    crossfade_channel.set_volume(1.0)
+    crossfade_channel.play(pygame.sndarray.make_sound(mixed if channels > 1 else mixed[:, 0]))
+    started = time.monotonic()
+    pygame.mixer.music.fadeout(int(handoff * 1000 / frequency))
+    eventlet.sleep(handoff / frequency)
+    pygame.mixer.music.stop()
     try:
-        current_vol = pygame.mixer.music.get_volume()
-        steps = int(fade_duration * 20)  # 20 steps per second
-        step_volume = current_vol / steps if steps > 0 else current_vol
-        for _ in range(steps):
-            current_vol = max(current_vol - step_volume, 0)
-            pygame.mixer.music.set_volume(current_vol)
-            eventlet.sleep(0.05)  # 50ms per step
-        pygame.mixer.music.stop()
-        pygame.mixer.music.set_volume(volume)  # Reset volume for next song
-        logger.info("Fade out complete")
+        if preloaded_data:
+            current_music_buffer = io.BytesIO(preloaded_data)
+            pygame.mixer.music.load(current_music_buffer, os.path.splitext(file_path)[1].lstrip('.'))
+        else:
+            current_music_buffer = None
+            run_blocking(pygame.mixer.music.load, file_path)
     except Exception as e:
-        logger.error(f"Error in fade_out: {e}")
-        pygame.mixer.music.stop()
+        logger.error(f"Error loading track {song_id} for crossfade: {e}")
+        pending_track = None
+        return
+    if pending_track != song_id:
+        return
+
+    pygame.mixer.music.set_volume(song_volume())
+    start_fade(song_volume(), max(0.0, duration - (time.monotonic() - started)),
+               then=lambda: finish_crossfade(song_id, duration))
+    pending_track = song_id
+    logger.info(f"Crossfading into song {song_id} over {duration}s (decode and mix took {started - requested:.2f}s)")
+
+
+def finish_crossfade(song_id, offset):
+    """Pick the incoming track up on the music stream where the crossfade buffer ends"""
+    global pending_track, seek_offset
+    try:
+        crossfade_channel.stop()
+        pygame.mixer.music.set_volume(song_volume())
+        seek_offset = offset
+        try:
+            pygame.mixer.music.play(start=offset)
+        except pygame.error as e:
+            logger.warning(f"Cannot start song {song_id} at {offset}s ({e}), restarting it")
+            seek_offset = 0
+            pygame.mixer.music.play()
+    except Exception as e:
+        logger.error(f"Error finishing crossfade into {song_id}: {e}")
+    finally:
+        if pending_track == song_id:
+            pending_track = None
+            notify_playback_changed()
 
 
 # Models
@@ -377,6 +931,10 @@ class Schedule(db.Model):
     saturday = db.Column(db.Boolean, default=True)
     sunday = db.Column(db.Boolean, default=True)
 
+    __table_args__ = (
+        db.Index('ix_schedule_enabled_time', 'enabled', 'time'),
+    )
+
     @property
     def weekdays(self):
         return {
@@ -401,6 +959,30 @@ class Song(db.Model):
     duration = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_played_at = db.Column(db.DateTime, nullable=True)
+    loudness_gain = db.Column(db.Float, nullable=True)  # dB to reach LOUDNESS_TARGET_LUFS; None until analysed
+
+    # Same column order as select_next_song's ORDER BY, so the next song is an index seek
+    __table_args__ = (
+        db.Index('ix_song_playlist_order', position, last_played_at.is_(None).desc(), priority.desc(), last_played_at),
+        db.Index('ix_song_category_playlist_order', category, position, last_played_at.is_(None).desc(), priority.desc(), last_played_at),
+        # Keyset pagination for /api/songs
+        db.Index('ix_song_position_id', position, id),
+        db.Index('ix_song_category_position_id', category, position, id),
+    )
+
+class DownloadJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(500), nullable=False)
+    status = db.Column(db.String(20), default='queued')  # 'queued', 'running', 'completed', 'failed' or 'cancelled'
+    message = db.Column(db.String(500), default='')
+    playlist_title = db.Column(db.String(200))
+    total_tracks = db.Column(db.Integer, default=0)
+    downloaded_tracks = db.Column(db.Integer, default=0)
+    failed_tracks = db.Column(db.Integer, default=0)
+    done_entries = db.Column(db.Text, default='[]')  # JSON list of finished playlist entry ids, so a resumed job skips them
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -418,6 +1000,74 @@ class User(db.Model):
         self.remember_token = secrets.token_urlsafe(64)
         return self.remember_token
 
+# Schema migrations
+def add_column_if_missing(connection, table, column, ddl):
+    """ALTER TABLE ... ADD COLUMN unless the column is already there"""
+    columns = [col['name'] for col in db.inspect(connection).get_columns(table)]
+    if column not in columns:
+        connection.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+        logger.info(f"Added column {table}.{column}")
+
+def migrate_song_category(connection):
+    add_column_if_missing(connection, 'song', 'category', "VARCHAR(20) DEFAULT 'music'")
+    add_column_if_missing(connection, 'schedule', 'song_category', "VARCHAR(20) DEFAULT 'music'")
+
+def migrate_delete_after_play(connection):
+    add_column_if_missing(connection, 'song', 'delete_after_play', "BOOLEAN DEFAULT 0")
+
+def migrate_one_time(connection):
+    add_column_if_missing(connection, 'schedule', 'one_time', "BOOLEAN DEFAULT 0")
+
+def migrate_remember_token(connection):
+    add_column_if_missing(connection, 'user', 'remember_token', "VARCHAR(100)")
+    connection.exec_driver_sql("CREATE UNIQUE INDEX IF NOT EXISTS ix_user_remember_token ON user(remember_token)")
+
+def migrate_schedule_volume(connection):
+    add_column_if_missing(connection, 'schedule', 'volume', "INTEGER DEFAULT 100")
+    connection.exec_driver_sql("UPDATE schedule SET volume = 100 WHERE volume IS NULL")
+
+def migrate_song_position(connection):
+    # Renumbering onto sparse keys is left to request_position_compaction()
+    add_column_if_missing(connection, 'song', 'position', "INTEGER DEFAULT 0")
+
+def migrate_song_loudness_gain(connection):
+    # Existing songs are measured by the loudness worker
+    add_column_if_missing(connection, 'song', 'loudness_gain', "FLOAT")
+
+def migrate_indexes(connection):
+    # IF NOT EXISTS rather than checkfirst: SQLAlchemy cannot reflect the
+    # expression indexes, so checkfirst misses them once create_all() has run
+    for table in (Song.__table__, Schedule.__table__):
+        for index in table.indexes:
+            connection.execute(CreateIndex(index, if_not_exists=True))
+
+# (version, description, migration). Append only; never renumber. Each step is
+# idempotent, so databases patched by the old migrate_*.py scripts are fine.
+SCHEMA_MIGRATIONS = [
+    (1, "song.category and schedule.song_category", migrate_song_category),
+    (2, "song.delete_after_play", migrate_delete_after_play),
+    (3, "schedule.one_time", migrate_one_time),
+    (4, "user.remember_token", migrate_remember_token),
+    (5, "schedule.volume", migrate_schedule_volume),
+    (6, "song.position", migrate_song_position),
+    (7, "song playlist-order and schedule indexes", migrate_indexes),
+    (8, "song position/id pagination indexes", migrate_indexes),
+    (9, "song.loudness_gain", migrate_song_loudness_gain),
+]
+
+def run_migrations():
+    """Bring the schema up to the latest version, tracked in SQLite's user_version"""
+    with db.engine.begin() as connection:
+        version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+        for target, description, migrate in SCHEMA_MIGRATIONS:
+            if target <= version:
+                continue
+            logger.info(f"Applying schema migration {target}: {description}")
+            migrate(connection)
+            connection.exec_driver_sql(f"PRAGMA user_version = {target}")
+            version = target
+    logger.info(f"Database schema at version {version}")
+
 # Create a function to check if a user is logged in
 def get_authenticated_user():
     """Check authentication via session cookie, with remember_token fallback.
@@ -465,28 +1115,327 @@ def socketio_login_required(f):
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def normalize_file_key(path):
+    """Index key for a path relative to BASE_DIR, ignoring the ｜/| difference"""
+    return os.path.join(os.path.dirname(path), os.path.basename(path).replace('｜', '|'))
+
+def scan_music_dir(dir_name):
+    """Rebuild the file index entries for one directory relative to BASE_DIR"""
+    entries = {}
+    with os.scandir(os.path.join(BASE_DIR, dir_name)) as it:
+        for entry in it:
+            if entry.is_file():
+                rel_path = os.path.join(dir_name, entry.name)
+                entries[normalize_file_key(rel_path)] = rel_path
+    # Drop stale entries for this directory, then add the fresh ones
+    for key in [k for k in list(file_index) if os.path.dirname(k) == dir_name]:
+        if key not in entries:
+            file_index.pop(key, None)
+    file_index.update(entries)
+    return len(entries)
+
+def build_file_index():
+    """Build the normalized-name -> path index for the music directory"""
+    try:
+        count = scan_music_dir(app.config['UPLOAD_FOLDER'])
+        logger.info(f"Indexed {count} music files")
+    except Exception as e:
+        logger.error(f"Error building music file index: {e}")
+
+def index_music_file(path):
+    """Add a file (relative to BASE_DIR or absolute) to the index after it is written"""
+    rel_path = os.path.relpath(path, BASE_DIR) if os.path.isabs(path) else path
+    file_index[normalize_file_key(rel_path)] = rel_path
+
+def unindex_music_file(path):
+    """Remove a file (relative to BASE_DIR or absolute) from the index after it is deleted"""
+    rel_path = os.path.relpath(path, BASE_DIR) if os.path.isabs(path) else path
+    file_index.pop(normalize_file_key(rel_path), None)
+
 def find_actual_file(filename):
     """Find the actual file regardless of special character differences"""
     try:
-        base_name = os.path.basename(filename)
-        dir_name = os.path.dirname(filename)
-        search_path = os.path.join(BASE_DIR, dir_name, '*')
-        
-        for file in glob.glob(search_path):
-            if os.path.basename(file).replace('｜', '|') == base_name:
-                return os.path.relpath(file, BASE_DIR)
-        return filename
+        key = normalize_file_key(filename)
+        actual = file_index.get(key)
+        if actual is None:
+            # Index miss: the file may have been added outside the app, rescan its directory once
+            scan_music_dir(os.path.dirname(filename))
+            actual = file_index.get(key)
+        return actual or filename
     except Exception as e:
         logger.error(f"Error finding file {filename}: {e}")
         return filename
 
+def run_blocking(func, *args, **kwargs):
+    """Run a blocking call (pygame load, file parsing) in eventlet's OS thread pool.
+
+    Keeps the hub free to serve sockets and timers while the call runs.
+    """
+    return tpool.execute(func, *args, **kwargs)
+
+def event_loop_probe():
+    """Measure how late the hub wakes a sleeping greenthread; lateness = time the loop was blocked"""
+    window_start = time.monotonic()
+    window_max = 0.0
+    event_loop_stats['since'] = datetime.utcnow().isoformat()
+    while True:
+        start = time.monotonic()
+        eventlet.sleep(EVENT_LOOP_PROBE_INTERVAL)
+        now = time.monotonic()
+        stall = max(0.0, now - start - EVENT_LOOP_PROBE_INTERVAL)
+        stall_ms = stall * 1000
+
+        event_loop_stats['samples'] += 1
+        if stall_ms > event_loop_stats['max_stall_ms']:
+            event_loop_stats['max_stall_ms'] = round(stall_ms, 1)
+        window_max = max(window_max, stall_ms)
+        if now - window_start >= 60:
+            event_loop_stats['recent_max_stall_ms'] = round(window_max, 1)
+            window_start = now
+            window_max = 0.0
+        else:
+            event_loop_stats['recent_max_stall_ms'] = round(max(event_loop_stats['recent_max_stall_ms'], window_max), 1)
+        if stall >= EVENT_LOOP_STALL_WARN:
+            event_loop_stats['stalls_over_warn'] += 1
+            logger.warning(f"Event loop blocked for {stall_ms:.0f}ms")
+
+def start_event_loop_probe():
+    """Start the event loop probe background task once"""
+    global event_loop_probe_started
+    if not event_loop_probe_started:
+        event_loop_probe_started = True
+        socketio.start_background_task(event_loop_probe)
+
+def probe_duration_mutagen(filename):
+    """Duration from the container/stream headers of any format mutagen knows, or 0"""
+    audio = mutagen.File(filename)
+    if audio is None or audio.info is None:
+        return 0
+    return audio.info.length or 0
+
+def probe_duration_ffprobe(filename):
+    """Duration as reported by ffprobe, for files mutagen cannot parse, or 0"""
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+         '-of', 'default=noprint_wrappers=1:nokey=1', filename],
+        capture_output=True, text=True, timeout=FFPROBE_TIMEOUT
+    )
+    if result.returncode != 0:
+        return 0
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return 0
+
 def get_audio_duration(filename):
+    """Duration in whole seconds for any ALLOWED_EXTENSIONS file; 0 if it cannot be determined"""
     try:
-        audio = MP3(filename)
-        return int(audio.info.length)
+        length = run_blocking(probe_duration_mutagen, filename)
+    except Exception as e:
+        logger.warning(f"mutagen could not read {filename}: {e}")
+        length = 0
+    if not length:
+        try:
+            length = probe_duration_ffprobe(filename)
+        except Exception as e:
+            logger.error(f"Error getting audio duration for {filename}: {e}")
+            length = 0
+    return int(length)
+
+def backfill_song_durations():
+    """Fill in Song.duration for rows stored without one, a batch at a time"""
+    last_id = 0
+    filled = 0
+    try:
+        while True:
+            with app.app_context():
+                with session_scope() as session:
+                    batch = session.query(Song.id, Song.filename).filter(
+                        Song.id > last_id,
+                        db.or_(Song.duration.is_(None), Song.duration <= 0)
+                    ).order_by(Song.id).limit(DURATION_BACKFILL_BATCH).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            rows = []
+            for song_id, filename in batch:
+                duration = get_audio_duration(os.path.join(BASE_DIR, find_actual_file(filename)))
+                if duration:
+                    rows.append({'song_id': song_id, 'new_duration': duration})
+
+            if rows:
+                with app.app_context():
+                    with session_scope() as session:
+                        song_table = Song.__table__
+                        session.execute(
+                            song_table.update()
+                            .where(song_table.c.id == db.bindparam('song_id'))
+                            .values(duration=db.bindparam('new_duration')),
+                            rows
+                        )
+                filled += len(rows)
+            eventlet.sleep(0)  # Let playback and requests run between batches
+
+        if filled:
+            logger.info(f"Backfilled duration for {filled} songs")
+            request_stats_refresh()
     except Exception as e:
-        logger.error(f"Error getting audio duration for {filename}: {e}")
+        logger.error(f"Error backfilling song durations: {e}")
+
+def loudness_gain_db(lufs):
+    """Gain that brings a track measured at lufs to LOUDNESS_TARGET_LUFS, within the limit"""
+    if lufs is None:
+        return 0.0  # Silent: nothing to normalise
+    return max(-LOUDNESS_GAIN_LIMIT_DB, min(LOUDNESS_GAIN_LIMIT_DB, LOUDNESS_TARGET_LUFS - lufs))
+
+def measure_song_loudness(file_path):
+    """Integrated loudness of a file in LUFS (None if silent), measured by loudness.py in a child process"""
+    result = subprocess.run(
+        [sys.executable, LOUDNESS_SCRIPT, '--nice', str(LOUDNESS_NICE), '--timeout', str(LOUDNESS_TIMEOUT), file_path],
+        capture_output=True, text=True, timeout=LOUDNESS_TIMEOUT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit status {result.returncode}")
+    return json.loads(result.stdout)
+
+def analyse_song_loudness(song_id, filename):
+    """Measure one song and store its gain; False if it could not be measured"""
+    if is_playing:
+        eventlet.sleep(LOUDNESS_PLAYING_PAUSE)  # Holding the slot, so this spaces out analyses
+    file_path = os.path.join(BASE_DIR, find_actual_file(filename))
+    try:
+        lufs = measure_song_loudness(file_path)
+    except Exception as e:
+        logger.warning(f"Loudness analysis failed for {file_path}: {e}")
+        loudness_failed.add(song_id)
+        return False
+    store_loudness_gain(song_id, loudness_gain_db(lufs))
+    return True
+
+def store_loudness_gain(song_id, gain):
+    """Save a song's gain, and apply it at once if the song is playing"""
+    global now_playing
+    with app.app_context():
+        with session_scope() as session:
+            song_table = Song.__table__
+            session.execute(song_table.update().where(song_table.c.id == song_id).values(loudness_gain=gain))
+    if now_playing and now_playing.id == song_id:
+        now_playing = now_playing._replace(gain=10 ** (gain / 20))
+        set_music_volume(song_volume())
+
+def analyse_pending_loudness():
+    """Measure every song stored without a loudness gain, LOUDNESS_WORKERS at a time.
+
+    Songs in loudness_failed are skipped, so a file ffmpeg cannot decode does not
+    cost another analysis (and LOUDNESS_PLAYING_PAUSE) each time a song is added.
+    """
+    last_id = 0
+    measured = 0
+    while True:
+        with app.app_context():
+            with session_scope() as session:
+                batch = session.query(Song.id, Song.filename).filter(
+                    Song.id > last_id,
+                    Song.loudness_gain.is_(None)
+                ).order_by(Song.id).limit(LOUDNESS_BATCH).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        pool = eventlet.GreenPool(LOUDNESS_WORKERS)
+        analyses = []
+        for song_id, filename in batch:
+            if song_id in loudness_failed:
+                continue
+            analyses.append(pool.spawn(analyse_song_loudness, song_id, filename))  # Waits for a free slot
+        measured += sum(1 for analysis in analyses if analysis.wait())
+
+    if measured:
+        logger.info(f"Measured loudness of {measured} songs")
+
+def loudness_worker():
+    """Analyse songs without a loudness gain at startup and whenever songs are added.
+
+    Analysis stays out of playback's way: at most LOUDNESS_WORKERS processes,
+    at LOUDNESS_NICE with idle-class I/O, and a LOUDNESS_PLAYING_PAUSE between
+    songs while music is playing.
+    """
+    while True:
+        try:
+            loudness_wakeup.clear()
+            analyse_pending_loudness()
+            loudness_wakeup.wait()
+        except Exception as e:
+            logger.error(f"Error in loudness worker: {e}")
+            eventlet.sleep(60)
+
+def start_loudness_worker():
+    """Start the loudness worker background task once"""
+    global loudness_worker_started
+    if not loudness_worker_started:
+        loudness_worker_started = True
+        socketio.start_background_task(loudness_worker)
+
+def next_song_position(session):
+    """Position key that places a song after every other song"""
+    max_position = session.query(db.func.max(Song.position)).scalar()
+    if max_position is None:
         return 0
+    if max_position + POSITION_GAP >= POSITION_MAX:
+        request_position_compaction()
+    return max_position + POSITION_GAP
+
+def compact_song_positions():
+    """Renumber every Song.position to evenly spaced keys, keeping the current order"""
+    try:
+        with app.app_context():
+            with session_scope() as session:
+                song_ids = [row.id for row in session.query(Song.id).order_by(
+                    Song.position.asc(),
+                    Song.last_played_at.is_(None).desc(),
+                    Song.priority.desc(),
+                    Song.last_played_at.asc(),
+                    Song.id.asc()
+                )]
+                if song_ids:
+                    session.execute(db.update(Song), [
+                        {'id': song_id, 'position': i * POSITION_GAP}
+                        for i, song_id in enumerate(song_ids)
+                    ])
+                logger.info(f"Compacted positions for {len(song_ids)} songs")
+                return True
+    except Exception as e:
+        logger.error(f"Error compacting song positions: {e}")
+        return False
+
+def positions_need_compaction():
+    """True if keys are duplicated, too close for a neighbour insert, or near POSITION_MAX"""
+    with app.app_context():
+        with session_scope() as session:
+            positions = [row.position or 0 for row in session.query(Song.position).order_by(Song.position.asc())]
+    if not positions:
+        return False
+    if positions[-1] >= POSITION_MAX:
+        return True
+    return any(b - a < 2 for a, b in zip(positions, positions[1:]))
+
+def compact_song_positions_if_needed():
+    """Background compaction pass, run daily and on demand"""
+    global position_compaction_pending
+    position_compaction_pending = False
+    try:
+        if positions_need_compaction():
+            compact_song_positions()
+    except Exception as e:
+        logger.error(f"Error checking song positions: {e}")
+
+def request_position_compaction():
+    """Schedule a compaction pass off the request path"""
+    global position_compaction_pending
+    if not position_compaction_pending:
+        position_compaction_pending = True
+        socketio.start_background_task(compact_song_positions_if_needed)
 
 def update_ytdlp():
     """Update yt-dlp with multiple methods compatible with Raspberry Pi"""
@@ -539,54 +1488,103 @@ def update_ytdlp():
 
     except Exception as e:
         logger.error(f"An unexpected error occurred during yt-dlp update: {e}")
+    finally:
+        refresh_ytdlp_version()
 
-def get_ytdlp_version():
-    """Get current yt-dlp version"""
+def refresh_ytdlp_version():
+    """Re-read the installed yt-dlp version in-process and cache it"""
+    global ytdlp_version
     try:
-        result = subprocess.run([sys.executable, "-m", "yt_dlp", "--version"],
-                              capture_output=True, text=True, timeout=10)
-        if result.returncode == 0:
-            return result.stdout.strip()
-        else:
-            return "Unknown"
+        importlib.invalidate_caches()
+        ytdlp_version = importlib.reload(yt_dlp.version).__version__
     except Exception as e:
         logger.error(f"Error getting yt-dlp version: {e}")
-        return "Unknown"
+        ytdlp_version = "Unknown"
+    return ytdlp_version
 
-def get_next_scheduled_song():
-    now = datetime.now()
-    current_time = now.strftime("%H:%M")
-    weekday = now.strftime("%A").lower()
+def get_ytdlp_version():
+    """Get current yt-dlp version (cached; refreshed after each update)"""
+    if ytdlp_version is None:
+        return refresh_ytdlp_version()
+    return ytdlp_version
+
+WEEKDAY_NAMES = {
+    'mon': 'monday', 'tue': 'tuesday', 'wed': 'wednesday', 'thu': 'thursday',
+    'fri': 'friday', 'sat': 'saturday', 'sun': 'sunday'
+}
+
+def timeline_remove(schedule_id):
+    """Drop a schedule from the fire timeline"""
+    entry = schedule_timeline_entries.pop(schedule_id, None)
+    if entry:
+        key = (entry[0], schedule_id)
+        i = bisect.bisect_left(schedule_timeline, key)
+        if i < len(schedule_timeline) and schedule_timeline[i] == key:
+            del schedule_timeline[i]
+
+def timeline_set(schedule_id, next_run_time, info):
+    """Insert or move a schedule in the fire timeline"""
+    timeline_remove(schedule_id)
+    if next_run_time is None:
+        return
+    bisect.insort(schedule_timeline, (next_run_time, schedule_id))
+    schedule_timeline_entries[schedule_id] = (next_run_time, info)
+
+def next_schedule_fires(count=1):
+    """Next `count` upcoming fires as (fire_time, schedule_id, info), soonest first.
+
+    Entries whose time has passed (the job fired) are refreshed from the job's
+    new next_run_time, so APScheduler's weekday-aware cron math is the single
+    source of truth.
+    """
+    now = datetime.now(timezone.utc)
+    for _ in range(len(schedule_timeline)):
+        if not schedule_timeline or schedule_timeline[0][0] > now:
+            break
+        fire_time, schedule_id = schedule_timeline[0]
+        job = scheduler.get_job(f"schedule_{schedule_id}") if scheduler else None
+        next_run_time = job.next_run_time if job else None
+        if next_run_time == fire_time:
+            break  # Job is firing right now; APScheduler has not advanced it yet
+        timeline_set(schedule_id, next_run_time, schedule_timeline_entries[schedule_id][1])
+
+    start = bisect.bisect_right(schedule_timeline, (now, float('inf')))
+    return [
+        (fire_time, schedule_id, schedule_timeline_entries[schedule_id][1])
+        for fire_time, schedule_id in schedule_timeline[start:start + count]
+    ]
 
+def get_next_schedule_info():
+    """Next schedule fire plus the song it would play, shared by every "next schedule" consumer"""
+    fires = next_schedule_fires(1)
+    if not fires:
+        return None
+    fire_time, schedule_id, info = fires[0]
+
+    song_title = None
     try:
-        with session_scope() as session:
-            schedules = session.query(Schedule).filter(
-                Schedule.time > current_time,
-                Schedule.enabled == True
-            ).order_by(Schedule.time).all()
-            
-            if not schedules:
-                schedules = session.query(Schedule).filter(
-                    Schedule.enabled == True
-                ).order_by(Schedule.time).all()
-            
-            valid_schedules = [s for s in schedules if getattr(s, weekday)]
-            
-            if valid_schedules:
-                next_schedule = valid_schedules[0]
-                next_song_to_play = session.query(Song).order_by(
-                    Song.position.asc(),
-                    Song.last_played_at.is_(None).desc(),
-                    Song.priority.desc(),
-                    Song.last_played_at.asc()
-                ).first()
-
-                weekdays = [day for day, enabled in next_schedule.weekdays.items() if enabled]
-                return {
-                    'time': next_schedule.time,
-                    'weekdays': weekdays,
-                    'song': next_song_to_play.title if next_song_to_play else None
-                }
+        with app.app_context():
+            with session_scope() as session:
+                next_song = select_next_song(session, info['song_category'])
+                song_title = next_song.title if next_song else None
+    except Exception as e:
+        logger.error(f"Error getting next song for schedule {schedule_id}: {e}")
+
+    return dict(
+        info,
+        song_title=song_title or 'Không có bài hát',
+        next_run_time=fire_time.isoformat()
+    )
+
+def get_next_scheduled_song():
+    try:
+        info = get_next_schedule_info()
+        if info:
+            return {
+                'time': info['time'],
+                'weekdays': info['weekdays'],
+                'song': info['song_title']
+            }
     except Exception as e:
         logger.error(f"Error getting next scheduled song: {e}")
     return None
@@ -594,193 +1592,614 @@ def get_next_scheduled_song():
 def broadcast_next_schedule():
     """Broadcast next schedule info to all clients"""
     try:
-        now = datetime.now()
-        current_time = now.strftime("%H:%M")
-        weekday = now.strftime("%A").lower()
-        
-        with session_scope() as session:
-            # Get schedules after current time
-            schedules = session.query(Schedule).filter(
-                Schedule.time > current_time,
-                Schedule.enabled == True
-            ).order_by(Schedule.time).all()
-            
-            # If no schedules after current time, get all enabled schedules (for next day)
-            if not schedules:
-                schedules = session.query(Schedule).filter(
-                    Schedule.enabled == True
-                ).order_by(Schedule.time).all()
-            
-            # Filter by current weekday
-            valid_schedules = [s for s in schedules if getattr(s, weekday)]
-            
-            next_schedule_info = None
-            if valid_schedules:
-                next_schedule = valid_schedules[0]
-                next_song = session.query(Song).order_by(
-                    Song.position.asc(),
-                    Song.last_played_at.is_(None).desc(),
-                    Song.priority.desc(),
-                    Song.last_played_at.asc()
-                ).first()
-                
-                next_schedule_info = {
-                    'time': next_schedule.time,
-                    'song_title': next_song.title if next_song else 'Không có bài hát'
-                }
-            
-            socketio.emit('next_schedule_update', {
-                'next_schedule': next_schedule_info
-            })
-            logger.info(f"Broadcast next schedule: {next_schedule_info}")
+        next_schedule_info = get_next_schedule_info()
+        socketio.emit('next_schedule_update', {
+            'next_schedule': next_schedule_info
+        })
+        logger.info(f"Broadcast next schedule: {next_schedule_info}")
     except Exception as e:
         logger.error(f"Error broadcasting next schedule: {e}")
 
-def schedule_music():
-    """Schedule music playback with improved error handling and thread safety."""
+def get_schedule_job_spec(schedule):
+    """Cron fields and job args for an enabled schedule, or None if it cannot be scheduled"""
+    try:
+        hour, minute = map(int, schedule.time.split(':'))
+    except ValueError as e:
+        logger.error(f"Error processing schedule {schedule.id}: {e}")
+        return None
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        logger.error(f"Invalid time format in schedule {schedule.id}: {schedule.time}")
+        return None
+        
+    days_of_week = [
+        day for day, enabled in [
+            ('mon', schedule.monday),
+            ('tue', schedule.tuesday),
+            ('wed', schedule.wednesday),
+            ('thu', schedule.thursday),
+            ('fri', schedule.friday),
+            ('sat', schedule.saturday),
+            ('sun', schedule.sunday)
+        ] if enabled
+    ]
+    if not days_of_week:
+        logger.warning(f"Schedule {schedule.id} has no enabled days, skipping")
+        return None
+    
+    # Pass schedule_id, one_time flag, song_category, and volume to the job
+    song_category = schedule.song_category or 'music'
+    volume = schedule.volume if schedule.volume is not None else 100
+    return (hour, minute, ','.join(days_of_week), (schedule.id, schedule.one_time, song_category, volume))
+
+def reconcile_schedule_job(schedule_id, spec):
+    """Make the live schedule_<id> job match spec (None removes it). Returns the action taken."""
+    job_id = f"schedule_{schedule_id}"
+    current = scheduled_job_specs.get(job_id)
+    live = scheduler.get_job(job_id) is not None
+
+    if spec is None:
+        scheduled_job_specs.pop(job_id, None)
+        timeline_remove(schedule_id)
+        if live:
+            scheduler.remove_job(job_id)
+            logger.info(f"Removed job {job_id}")
+            return 'removed'
+        return None
+
+    if live and current == spec:
+        return None
+
+    hour, minute, days_of_week, job_args = spec
+    job = scheduler.add_job(
+        play_next_song,
+        'cron',
+        hour=hour,
+        minute=minute,
+        day_of_week=days_of_week,
+        id=job_id,
+        args=list(job_args),
+        replace_existing=True
+    )
+    scheduled_job_specs[job_id] = spec
+    timeline_set(schedule_id, job.next_run_time, {
+        'time': f"{hour:02d}:{minute:02d}",
+        'weekdays': [WEEKDAY_NAMES[day] for day in days_of_week.split(',')],
+        'song_category': job_args[2]
+    })
+    action = 'modified' if live else 'added'
+    logger.info(f"{action.capitalize()} job {job_id} for days: {days_of_week} at {hour:02d}:{minute:02d}, one_time={job_args[1]}, category={job_args[2]}")
+    return action
+
+def schedule_music(schedule_ids=None):
+    """Reconcile APScheduler schedule_<id> jobs with the Schedule table.
+
+    With schedule_ids only those schedules are looked at; otherwise every
+    schedule is diffed against the live jobs. Only jobs whose schedule
+    changed are added, modified or removed; other jobs are never touched.
+    """
     global scheduler
     with app.app_context():
         try:
             if scheduler is None:
                 init_scheduler()
-            # Store existing jobs we want to preserve
-            preserved_jobs = {}
-            for job in scheduler.get_jobs():
-                if job.id in ['broadcast_playback', 'update_ytdlp']:
-                    preserved_jobs[job.id] = job.trigger
-                    
-            scheduler.remove_all_jobs()
-            
-            # Restore preserved jobs
-            if 'broadcast_playback' in preserved_jobs:
-                scheduler.add_job(
-                    broadcast_playback_state,
-                    'interval',
-                    seconds=BROADCAST_INTERVAL,
-                    id='broadcast_playback'
-                )
-            
-            if 'update_ytdlp' in preserved_jobs:
-                scheduler.add_job(
-                    update_ytdlp,
-                    'cron',
-                    hour=UPDATE_YTDLP_HOUR,
-                    id='update_ytdlp'
-                )
+
+            desired = {}
             with session_scope() as session:
-                schedules = session.query(Schedule).filter_by(enabled=True).all()
-                logger.info(f"Setting up schedules: {len(schedules)} found")
-                
-                for schedule in schedules:
-                    logger.info(f"Processing schedule {schedule.id} at {schedule.time}")
-                    try:
-                        hour, minute = map(int, schedule.time.split(':'))
-                        if not (0 <= hour <= 23 and 0 <= minute <= 59):
-                            logger.error(f"Invalid time format in schedule {schedule.id}: {schedule.time}")
-                            continue
-                            
-                        days_of_week = [
-                            day for day, enabled in [
-                                ('mon', schedule.monday),
-                                ('tue', schedule.tuesday),
-                                ('wed', schedule.wednesday),
-                                ('thu', schedule.thursday),
-                                ('fri', schedule.friday),
-                                ('sat', schedule.saturday),
-                                ('sun', schedule.sunday)
-                            ] if enabled
-                        ]
-                        
-                        if days_of_week:
-                            job_id = f"schedule_{schedule.id}"
-                            
-                            # Check if time is in the past for today
-                            now = datetime.now()
-                            schedule_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                            
-                            # Pass schedule_id, one_time flag, song_category, and volume to the job
-                            song_category = schedule.song_category or 'music'
-                            volume = schedule.volume if schedule.volume is not None else 100
-                            job_args = [schedule.id, schedule.one_time, song_category, volume]
-                            
-                            if schedule_time > now:
-                                scheduler.add_job(
-                                    play_next_song,
-                                    'cron',
-                                    hour=hour,
-                                    minute=minute,
-                                    day_of_week=','.join(days_of_week),
-                                    id=job_id,
-                                    args=job_args,
-                                    replace_existing=True,
-                                    next_run_time=schedule_time
-                                )
-                                logger.info(f"Added job {job_id} with next run today at {schedule_time}, one_time={schedule.one_time}, category={song_category}")
-                            else:
-                                scheduler.add_job(
-                                    play_next_song,
-                                    'cron',
-                                    hour=hour,
-                                    minute=minute,
-                                    day_of_week=','.join(days_of_week),
-                                    id=job_id,
-                                    args=job_args,
-                                    replace_existing=True
-                                )
-                                logger.info(f"Added job {job_id} for days: {','.join(days_of_week)} at {hour:02d}:{minute:02d}, one_time={schedule.one_time}, category={song_category}")
-                        else:
-                            logger.warning(f"Schedule {schedule.id} has no enabled days, skipping")
-                    except ValueError as e:
-                        logger.error(f"Error processing schedule {schedule.id}: {e}")
-                        continue
-                
-                # Log final job count for debugging
-                all_jobs = scheduler.get_jobs()
-                schedule_jobs = [job for job in all_jobs if job.id.startswith('schedule_')]
-                logger.info(f"Schedule reload complete. Total jobs: {len(all_jobs)}, Schedule jobs: {len(schedule_jobs)}")
-                for job in schedule_jobs:
-                    logger.info(f"  Job {job.id}: next run at {job.next_run_time}")
-                
-                return True
+                query = session.query(Schedule).filter_by(enabled=True)
+                if schedule_ids is not None:
+                    query = query.filter(Schedule.id.in_(list(schedule_ids)))
+                for schedule in query.all():
+                    desired[schedule.id] = get_schedule_job_spec(schedule)
+
+            if schedule_ids is not None:
+                candidates = set(schedule_ids)
+            else:
+                live_ids = {
+                    int(job.id.split('_', 1)[1]) for job in scheduler.get_jobs()
+                    if job.id.startswith('schedule_')
+                }
+                candidates = live_ids | set(desired)
+
+            changes = {'added': 0, 'modified': 0, 'removed': 0}
+            for schedule_id in candidates:
+                action = reconcile_schedule_job(schedule_id, desired.get(schedule_id))
+                if action:
+                    changes[action] += 1
+
+            schedule_jobs = [job for job in scheduler.get_jobs() if job.id.startswith('schedule_')]
+            logger.info(f"Schedule reconcile complete: {changes}, schedule jobs: {len(schedule_jobs)}")
+            
+            schedule_next_preload()
+            return True
                 
         except Exception as e:
             logger.error(f"Error in schedule_music: {e}")
-            # Attempt to restore critical jobs on error
-            try:
-                if 'broadcast_playback' not in scheduler:
-                    scheduler.add_job(
-                        broadcast_playback_state,
-                        'interval',
-                        seconds=BROADCAST_INTERVAL,
-                        id='broadcast_playback'
-                    )
-            except Exception as e:
-                logger.error(f"Failed to restore broadcast job: {e}")
             return False
 
+def shuffle_bag_key(song_category):
+    """Bag a schedule category draws from; songs without a category count as music"""
+    return song_category if song_category in ('music', 'announcement', 'all') else 'music'
+
+def shuffle_bag_swap(bag, i, j):
+    order, index = bag['order'], bag['index']
+    order[i], order[j] = order[j], order[i]
+    index[order[i]] = i
+    index[order[j]] = j
+
+def shuffle_bag_insert(bag, song_id):
+    """Put a song into a random not-yet-played slot of one bag in O(1)"""
+    if song_id in bag['index']:
+        return
+    bag['order'].append(song_id)
+    bag['index'][song_id] = len(bag['order']) - 1
+    shuffle_bag_swap(bag, len(bag['order']) - 1, random.randint(bag['cursor'], len(bag['order']) - 1))
+
+def shuffle_bag_discard(bag, song_id):
+    """Drop a song from one bag in O(1), keeping the played/unplayed split"""
+    i = bag['index'].get(song_id)
+    if i is None:
+        return
+    if i < bag['cursor']:
+        # Played slot: swap it to the boundary, then move the boundary past it
+        shuffle_bag_swap(bag, i, bag['cursor'] - 1)
+        i = bag['cursor'] - 1
+        bag['cursor'] -= 1
+    shuffle_bag_swap(bag, i, len(bag['order']) - 1)
+    bag['order'].pop()
+    del bag['index'][song_id]
+
+def refill_shuffle_bag(session, key):
+    """Start a new cycle: a fresh permutation of every song id in the bag's category"""
+    query = session.query(Song.id)
+    if key == 'music':
+        query = query.filter(db.or_(Song.category == 'music', Song.category.is_(None)))
+    elif key != 'all':
+        query = query.filter(Song.category == key)
+    order = [row.id for row in query]
+    random.shuffle(order)
+    last = shuffle_bags.get(key, {}).get('last')
+    if len(order) > 1 and order[0] == last:
+        # Never play the last song of one cycle first in the next
+        swap_with = random.randrange(1, len(order))
+        order[0], order[swap_with] = order[swap_with], order[0]
+    bag = {'order': order, 'index': {song_id: i for i, song_id in enumerate(order)}, 'cursor': 0, 'last': last}
+    shuffle_bags[key] = bag
+    return bag
+
+def pick_shuffled_song(session, song_category):
+    """Next song from the category's shuffle bag; every song plays once per cycle"""
+    key = shuffle_bag_key(song_category)
+    bag = shuffle_bags.get(key)
+    refilled = bag is None or bag['cursor'] >= len(bag['order'])
+    if refilled:
+        bag = refill_shuffle_bag(session, key)
+
+    # Slots only go stale if a song vanished outside the app; skip those. A refill
+    # reads the table, so at most one is needed, and an empty one means no songs.
+    while bag['cursor'] < len(bag['order']):
+        song_id = bag['order'][bag['cursor']]
+        bag['cursor'] += 1
+        song = session.get(Song, song_id)
+        if song is not None:
+            bag['last'] = song_id
+            save_shuffle_bags()
+            return song
+        if bag['cursor'] >= len(bag['order']) and not refilled:
+            bag = refill_shuffle_bag(session, key)
+            refilled = True
+    return None
+
+def shuffle_bag_add(song_id, category):
+    """Patch the bags (if built) for a newly added song"""
+    for key in (shuffle_bag_key(category), 'all'):
+        if key in shuffle_bags:
+            shuffle_bag_insert(shuffle_bags[key], song_id)
+    save_shuffle_bags()
+
+def shuffle_bag_remove(song_id):
+    """Patch the bags for a deleted song"""
+    for bag in shuffle_bags.values():
+        shuffle_bag_discard(bag, song_id)
+    save_shuffle_bags()
+
+def shuffle_bag_recategorize(song_id, old_category, new_category):
+    """Move a song between category bags; the 'all' bag is unaffected"""
+    old_key, new_key = shuffle_bag_key(old_category), shuffle_bag_key(new_category)
+    if old_key == new_key:
+        return
+    if old_key in shuffle_bags:
+        shuffle_bag_discard(shuffle_bags[old_key], song_id)
+    if new_key in shuffle_bags:
+        shuffle_bag_insert(shuffle_bags[new_key], song_id)
+    save_shuffle_bags()
+
+def save_shuffle_bags():
+    """Write the bags to SHUFFLE_STATE_FILE, if configured, so a restart keeps the cycle"""
+    path = app.config['SHUFFLE_STATE_FILE']
+    if not path:
+        return
+    try:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                key: {'order': bag['order'], 'cursor': bag['cursor'], 'last': bag['last']}
+                for key, bag in shuffle_bags.items()
+            }, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error(f"Error saving shuffle state: {e}")
+
+def load_shuffle_bags():
+    """Restore bags from SHUFFLE_STATE_FILE, patched for songs added or deleted meanwhile"""
+    path = app.config['SHUFFLE_STATE_FILE']
+    if not path or not os.path.exists(path):
+        return
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+        with session_scope() as session:
+            categories = dict(session.query(Song.id, Song.category).all())
+        for key, state in saved.items():
+            order = list(state['order'])
+            bag = {
+                'order': order,
+                'index': {song_id: i for i, song_id in enumerate(order)},
+                'cursor': min(state['cursor'], len(order)),
+                'last': state.get('last')
+            }
+            for song_id in [song_id for song_id in order if song_id not in categories]:
+                shuffle_bag_discard(bag, song_id)
+            for song_id, category in categories.items():
+                if key == 'all' or shuffle_bag_key(category) == key:
+                    shuffle_bag_insert(bag, song_id)
+            shuffle_bags[key] = bag
+        logger.info(f"Restored shuffle bags: {', '.join(shuffle_bags) or 'none'}")
+    except Exception as e:
+        logger.error(f"Error loading shuffle state: {e}")
+        shuffle_bags.clear()
+
+def song_base_weight(priority):
+    """Weighted mode: a priority-p song comes up p+1 times as often as a priority-0 one"""
+    return 1.0 + max(priority or 0, 0)
+
+def recent_play_factor(played_at, now):
+    """(weight factor, time of the next recovery step) for a song last played at played_at.
+
+    The factor climbs linearly from WEIGHTED_RECENT_FACTOR to 1 over
+    WEIGHTED_COOLDOWN_HOURS in WEIGHTED_RECOVERY_STEPS steps; the step time is
+    None once the song has fully recovered.
+    """
+    step = timedelta(hours=WEIGHTED_COOLDOWN_HOURS) / WEIGHTED_RECOVERY_STEPS
+    steps_done = max(int((now - played_at) / step), 0)
+    if steps_done >= WEIGHTED_RECOVERY_STEPS:
+        return 1.0, None
+    factor = WEIGHTED_RECENT_FACTOR + (1 - WEIGHTED_RECENT_FACTOR) * steps_done / WEIGHTED_RECOVERY_STEPS
+    return factor, played_at + step * (steps_done + 1)
+
+class WeightedSongIndex:
+    """Fenwick tree over per-song weights: O(log n) weighted picks and weight updates.
+
+    A song's weight is its base weight times recent_play_factor(): cut to
+    WEIGHTED_RECENT_FACTOR of it when it plays, then recovering in steps over
+    WEIGHTED_COOLDOWN_HOURS. Steps are applied lazily from a heap when picking. Removed songs keep their slot at weight 0 until
+    removed slots outnumber live ones; then the tree is rebuilt without them.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.slots = {}
+        self.weights = []
+        self.base = {}
+        self.tree = [0.0]
+        self.total = 0.0
+        self.cooling = {}  # song_id -> (played_at, factor applied now)
+        self.cooldowns = []  # heap of (next step, song_id, played_at)
+
+    def _add(self, i, delta):
+        self.total += delta
+        i += 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def _set(self, i, weight):
+        self._add(i, weight - self.weights[i])
+        self.weights[i] = weight
+
+    def add(self, song_id, base, played_at=None, now=None):
+        if song_id in self.slots:
+            return
+        i = len(self.ids)
+        self.ids.append(song_id)
+        self.slots[song_id] = i
+        self.weights.append(0.0)
+        # New Fenwick node i+1 covers (i+1-lowbit, i+1]; seed it with the sum of the earlier part
+        node = i + 1
+        covered, j = 0.0, i
+        while j > node - (node & -node):
+            covered += self.tree[j]
+            j -= j & -j
+        self.tree.append(covered)
+        self.base[song_id] = base
+        self._set(i, base)
+        if played_at:
+            self.cool_down(song_id, played_at, now)
+
+    def remove(self, song_id):
+        i = self.slots.pop(song_id, None)
+        if i is not None:
+            self._set(i, 0.0)
+            self.base.pop(song_id, None)
+            self.cooling.pop(song_id, None)
+            if len(self.ids) - len(self.slots) > max(len(self.slots), 64):
+                self.rebuild()
+
+    def rebuild(self):
+        """Drop removed slots and rebuild the tree in O(n), also clearing float drift in total"""
+        live = [song_id for song_id in self.ids if song_id in self.slots]
+        self.weights = [self.weights[self.slots[song_id]] for song_id in live]
+        self.ids = live
+        self.slots = {song_id: i for i, song_id in enumerate(live)}
+        tree = [0.0] + self.weights
+        for node in range(1, len(tree)):
+            parent = node + (node & -node)
+            if parent < len(tree):
+                tree[parent] += tree[node]
+        self.tree = tree
+        self.total = sum(self.weights)
+        self.cooldowns = [entry for entry in self.cooldowns if entry[1] in self.slots]
+        heapq.heapify(self.cooldowns)
+
+    def set_base(self, song_id, base):
+        i = self.slots.get(song_id)
+        if i is None:
+            return
+        self.base[song_id] = base
+        self._set(i, base * self.cooling.get(song_id, (None, 1.0))[1])
+
+    def cool_down(self, song_id, played_at, now=None):
+        """Apply the weight cut of a play at played_at and queue its recovery steps"""
+        i = self.slots.get(song_id)
+        if i is None:
+            return
+        factor, next_step = recent_play_factor(played_at, now or datetime.utcnow())
+        if next_step is None:
+            return
+        self.cooling[song_id] = (played_at, factor)
+        heapq.heappush(self.cooldowns, (next_step, song_id, played_at))
+        self._set(i, self.base[song_id] * factor)
+
+    def expire_cooldowns(self, now):
+        while self.cooldowns and self.cooldowns[0][0] <= now:
+            _, song_id, played_at = heapq.heappop(self.cooldowns)
+            if self.cooling.get(song_id, (None,))[0] != played_at:
+                continue  # Superseded by a later play, or removed
+            factor, next_step = recent_play_factor(played_at, now)
+            if next_step is None:
+                del self.cooling[song_id]
+            else:
+                self.cooling[song_id] = (played_at, factor)
+                heapq.heappush(self.cooldowns, (next_step, song_id, played_at))
+            self._set(self.slots[song_id], self.base[song_id] * factor)
+
+    def pick(self, now):
+        """Song id drawn with probability proportional to its weight, or None"""
+        self.expire_cooldowns(now)
+        if self.total <= 0:
+            return None
+        remaining = random.random() * self.total
+        pos = 0
+        step = 1 << (len(self.ids).bit_length() - 1)
+        while step:
+            nxt = pos + step
+            if nxt <= len(self.ids) and self.tree[nxt] <= remaining:
+                pos = nxt
+                remaining -= self.tree[nxt]
+            step >>= 1
+        # Float drift can run off the end or onto a removed slot; take the last live song instead
+        while pos >= len(self.ids) or self.weights[pos] <= 0:
+            pos -= 1
+            if pos < 0:
+                return None
+        return self.ids[pos]
+
+def build_weighted_index(session, key):
+    query = session.query(Song.id, Song.priority, Song.last_played_at)
+    if key == 'music':
+        query = query.filter(db.or_(Song.category == 'music', Song.category.is_(None)))
+    elif key != 'all':
+        query = query.filter(Song.category == key)
+    now = datetime.utcnow()
+    index = WeightedSongIndex()
+    for song_id, priority, last_played_at in query:
+        index.add(song_id, song_base_weight(priority), last_played_at, now)
+    weighted_indexes[key] = index
+    return index
+
+def pick_weighted_song(session, song_category):
+    """Weighted-fair pick: priority raises a song's odds, a recent play lowers them"""
+    key = shuffle_bag_key(song_category)
+    index = weighted_indexes.get(key) or build_weighted_index(session, key)
+    now = datetime.utcnow()
+    for _ in range(3):
+        song_id = index.pick(now)
+        if song_id is None:
+            return None
+        song = session.get(Song, song_id)
+        if song is not None:
+            return song
+        index.remove(song_id)
+    return None
+
+def weighted_song_played(song_id, played_at):
+    for index in weighted_indexes.values():
+        index.cool_down(song_id, played_at)
+
+def notify_song_added(song_id, category, priority=0):
+    """Keep the in-memory selection state in step with a newly stored song"""
+    shuffle_bag_add(song_id, category)
+    for key in (shuffle_bag_key(category), 'all'):
+        if key in weighted_indexes:
+            weighted_indexes[key].add(song_id, song_base_weight(priority))
+
+def notify_song_removed(song_id):
+    shuffle_bag_remove(song_id)
+    for index in weighted_indexes.values():
+        index.remove(song_id)
+
+def notify_song_recategorized(song_id, old_category, new_category, priority=0):
+    shuffle_bag_recategorize(song_id, old_category, new_category)
+    old_key, new_key = shuffle_bag_key(old_category), shuffle_bag_key(new_category)
+    if old_key != new_key:
+        if old_key in weighted_indexes:
+            weighted_indexes[old_key].remove(song_id)
+        if new_key in weighted_indexes:
+            weighted_indexes[new_key].add(song_id, song_base_weight(priority))
+
+def notify_song_priority_changed(song_id, priority):
+    for index in weighted_indexes.values():
+        index.set_base(song_id, song_base_weight(priority))
+
+def get_playback_settings():
+    return {
+        'selection_mode': selection_mode,
+        'shuffle_mode': selection_mode == 'shuffle',
+        'fade_enabled': fade_enabled,
+        'fade_duration': fade_duration,
+        'crossfade_enabled': crossfade_enabled
+    }
+
+def select_next_song(session, song_category):
+    """Next song in playlist order for a category (the non-shuffle selection)"""
+    query = session.query(Song)
+    if song_category and song_category != 'all':
+        query = query.filter(Song.category == song_category)
+    return query.order_by(
+        Song.position.asc(),
+        Song.last_played_at.is_(None).desc(),
+        Song.priority.desc(),
+        Song.last_played_at.asc()
+    ).first()
+
+# Selection engines for play_next_song: (session, song_category) -> Song or None
+SONG_SELECTORS = {
+    'playlist': select_next_song,
+    'shuffle': pick_shuffled_song,
+    'weighted': pick_weighted_song
+}
+
+def read_file_bytes(file_path):
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+def warm_page_cache(file_path):
+    """Ask the kernel to read a file ahead into the page cache without holding it ourselves"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
+
+def preload_track(song_id):
+    """Resolve a song's file and read it into memory so play_music() can start it at once.
+
+    Files over PRELOAD_MAX_BYTES are not held; their pages are only read ahead
+    so the load at trigger time comes from the page cache.
+    """
+    global preloaded_track
+    with app.app_context():
+        with session_scope() as session:
+            song = session.get(Song, song_id)
+            if not song:
+                return False
+            file_path = os.path.join(BASE_DIR, find_actual_file(song.filename))
+
+    if not os.path.exists(file_path):
+        return False
+    mtime = os.path.getmtime(file_path)
+    track = preloaded_track
+    if track and track['song_id'] == song_id and track['file_path'] == file_path and track['mtime'] == mtime:
+        return True
+
+    data = None
+    if os.path.getsize(file_path) <= PRELOAD_MAX_BYTES:
+        data = run_blocking(read_file_bytes, file_path)
+    else:
+        warm_page_cache(file_path)
+    preloaded_track = {'song_id': song_id, 'file_path': file_path, 'mtime': mtime, 'data': data}
+    logger.info(f"Preloaded song {song_id} ({len(data) if data else 0} bytes): {file_path}")
+    return True
+
+def get_next_schedule_job():
+    """The schedule_* job that fires next, or None"""
+    fires = next_schedule_fires(1)
+    if scheduler is None or not fires:
+        return None
+    return scheduler.get_job(f"schedule_{fires[0][1]}")
+
+def preload_next_scheduled_track():
+    """Preload the song the next schedule will play"""
+    try:
+        job = get_next_schedule_job()
+        if not job:
+            return
+        song_category = job.args[2] if len(job.args) > 2 else 'music'
+        if selection_mode == 'weighted':
+            return  # Weighted picks are drawn at fire time
+        if selection_mode == 'shuffle':
+            # The bag already holds the next pick; a bag about to refill cannot be predicted
+            bag = shuffle_bags.get(shuffle_bag_key(song_category))
+            next_song_id = bag['order'][bag['cursor']] if bag and bag['cursor'] < len(bag['order']) else None
+        else:
+            with app.app_context():
+                with session_scope() as session:
+                    next_song = select_next_song(session, song_category)
+                    next_song_id = next_song.id if next_song else None
+        if next_song_id:
+            preload_track(next_song_id)
+    except Exception as e:
+        logger.error(f"Error preloading next track: {e}")
+
+def schedule_next_preload():
+    """(Re)arm a one-off job that preloads the next scheduled track shortly before it fires"""
+    try:
+        job = get_next_schedule_job()
+        if not job:
+            return
+        now = datetime.now(job.next_run_time.tzinfo)
+        run_date = max(now, job.next_run_time - timedelta(seconds=PRELOAD_LEAD_SECONDS))
+        scheduler.add_job(
+            preload_next_scheduled_track,
+            'date',
+            run_date=run_date,
+            id='preload_next',
+            replace_existing=True
+        )
+    except Exception as e:
+        logger.error(f"Error scheduling track preload: {e}")
+
+def take_preloaded_track(song_id, file_path):
+    """Return the in-memory bytes for song_id if they are current, consuming the preload"""
+    global preloaded_track
+    track = preloaded_track
+    if not track or track['song_id'] != song_id or track['file_path'] != file_path or not track['data']:
+        return None
+    try:
+        if os.path.getmtime(file_path) != track['mtime']:
+            return None
+    except OSError:
+        return None
+    preloaded_track = None
+    return track['data']
+
 def play_next_song(schedule_id=None, one_time=False, song_category='music', volume=100):
     with app.app_context():
-        logger.info(f"Scheduler triggered play next song (schedule_id={schedule_id}, one_time={one_time}, shuffle={shuffle_mode}, category={song_category}, volume={volume})")
+        logger.info(f"Scheduler triggered play next song (schedule_id={schedule_id}, one_time={one_time}, mode={selection_mode}, category={song_category}, volume={volume})")
         try:
             with session_scope() as session:
-                # Build base query with category filter
-                base_query = session.query(Song)
-                if song_category and song_category != 'all':
-                    base_query = base_query.filter(Song.category == song_category)
-                
-                if shuffle_mode:
-                    # Shuffle mode: pick a random song from filtered category
-                    from sqlalchemy.sql.expression import func
-                    next_song = base_query.order_by(func.random()).first()
-                    logger.info(f"Shuffle mode: randomly selected song from category '{song_category}'")
-                else:
-                    # Normal mode: prioritize songs that haven't been played
-                    next_song = base_query.order_by(
-                        Song.position.asc(),
-                        Song.last_played_at.is_(None).desc(),
-                        Song.priority.desc(),
-                        Song.last_played_at.asc()
-                    ).first()
+                next_song = SONG_SELECTORS[selection_mode](session, song_category)
 
                 if next_song:
                     logger.info(f"Playing song: {next_song.title} (category: {next_song.category})")
@@ -813,13 +2232,15 @@ def play_next_song(schedule_id=None, one_time=False, song_category='music', volu
             # Broadcast next schedule update after potential disable
             if one_time and schedule_id:
                 broadcast_next_schedule()
-                schedule_music()  # Reload schedules to remove the disabled job
+                schedule_music([schedule_id])  # Remove the disabled job
+            else:
+                schedule_next_preload()  # The played song moved to the end, so the next one changed
                 
         except Exception as e:
             logger.error(f"Error playing next song: {e}")
 
 def play_music(song_id):
-    global current_song_id, current_song_duration, is_playing, current_position, seek_offset
+    global current_song_id, current_song_duration, is_playing, current_position, seek_offset, pending_track
     
     try:
         with session_scope() as session:
@@ -834,50 +2255,41 @@ def play_music(song_id):
                 logger.error(f"File not found: {file_path}")
                 return False
 
-            if pygame.mixer.music.get_busy():
-                # Fade out current song if fade is enabled
-                if fade_enabled:
-                    fade_out()
-                else:
-                    pygame.mixer.music.stop()
+            preloaded_data = take_preloaded_track(song_id, file_path)
+            crossfade = fade_enabled and crossfade_enabled and now_playing and pygame.mixer.music.get_busy()
+            if crossfade:
+                start_crossfade(song_id, file_path, preloaded_data)  # Captures the outgoing track first
 
-            pygame.mixer.music.load(file_path)
-            
-            # Start with volume 0 if fade is enabled
-            if fade_enabled:
-                pygame.mixer.music.set_volume(0)
-                pygame.mixer.music.play()
-                # Fade in
-                fade_in()
-            else:
-                pygame.mixer.music.set_volume(volume)
-                pygame.mixer.music.play()
-            
+            # Now-playing goes first: the switch below applies the new song's loudness gain
             current_song_id = song_id
             current_song_duration = song.duration
+            set_now_playing(song, file_path)
             is_playing = True
             current_position = 0
             seek_offset = 0
+
+            if crossfade:
+                pass  # run_crossfade() brings the new track in
+            elif fade_enabled and pygame.mixer.music.get_busy():
+                # Fade the current song out; the fade engine switches tracks when it ends
+                start_fade(0, fade_duration, then=lambda: switch_track(song_id, file_path, preloaded_data))
+                pending_track = song_id
+            else:
+                cancel_fade(restore=False)
+                cancel_crossfade()
+                pending_track = song_id
+                switch_track(song_id, file_path, preloaded_data)
             
-            # Update last_played_at and move song to end of playlist
-            song.last_played_at = datetime.utcnow()
-            
-            # Move this song to the end and reorder other songs
-            # Get all songs ordered by current position
-            all_songs = session.query(Song).order_by(Song.position.asc()).all()
-            
-            # Remove the current song from the list and add it to the end
-            other_songs = [s for s in all_songs if s.id != song_id]
-            other_songs.append(song)
-            
-            # Reassign positions starting from 0
-            for i, s in enumerate(other_songs):
-                s.position = i
+            # Update last_played_at and move song to end of playlist (single row write)
+            played_at = song.last_played_at = datetime.utcnow()
+            song.position = next_song_position(session)
             
             logger.info(f"Updated song {song.title} - last_played_at: {song.last_played_at}, new position: {song.position} (moved to end)")
-            
-            broadcast_playback_state()
-            return True
+
+        # Selection state follows the DB only once the play is committed
+        weighted_song_played(song_id, played_at)
+        notify_playback_changed()
+        return True
 
     except pygame.error as e:
         logger.error(f"Pygame error playing music: {e}")
@@ -906,50 +2318,171 @@ def is_playlist_url(url):
     ]
     return any(indicator in url for indicator in playlist_indicators)
 
+def create_download_ydl():
+    """Create the YoutubeDL for one track download.
+
+    The output name comes from the normalized_title field that download_track()
+    puts in the info dict. YoutubeDL keeps per-download state, so parallel
+    workers each get their own instance.
+    """
+    return yt_dlp.YoutubeDL(download_options(MUSIC_DIR, [check_download_cancelled]))
+
+def download_track(url, fallback_title=None, skip_existing=False):
+    """Resolve a video once and download from that result.
+
+    Returns {'title', 'filename', 'duration'} or, with skip_existing, None if
+    the mp3 is already on disk.
+    """
+    with create_download_ydl() as ydl:
+        return download_resolved_track(ydl, url, fallback_title, skip_existing)
+
+def download_resolved_track(ydl, url, fallback_title, skip_existing):
+    """download_track() body, run with the track's own YoutubeDL"""
+    info = resolve_track_info(ydl, url)
+    title = info.get('title') or fallback_title or url
+    duration = int(info.get('duration') or 0)
+    normalized_title = normalize_filename(title)
+
+    mp3_file = os.path.join(MUSIC_DIR, f'{normalized_title}.mp3')
+    if skip_existing and os.path.exists(mp3_file):
+        logger.info(f"Song already exists, skipping: {title}")
+        return None
+
+    info['normalized_title'] = normalized_title
+    ydl.process_ie_result(info, download=True)
+
+    if not os.path.exists(mp3_file):
+        raise Exception(f"File was not created: {mp3_file}")
+        
+    actual_filename = os.path.relpath(mp3_file, BASE_DIR)
+    index_music_file(actual_filename)
+    
+    if duration == 0:
+        duration = get_audio_duration(mp3_file)
+    
+    return {
+        'title': title,
+        'filename': actual_filename,
+        'duration': duration
+    }
+
 def download_single_track(url):
     """Download a single track from YouTube"""
     try:
-        # First extract info without downloading
-        with yt_dlp.YoutubeDL({'extract_flat': True}) as ydl:
-            info = ydl.extract_info(url, download=False)
-            duration = int(info.get('duration', 0))
-            normalized_title = normalize_filename(info['title'])
-            
-        # Then download with normalized filename
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': os.path.join(MUSIC_DIR, f'{normalized_title}.%(ext)s'),
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-        }
-        
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
-        
-        # Get the actual mp3 file
-        mp3_file = os.path.join(MUSIC_DIR, f'{normalized_title}.mp3')
-        if not os.path.exists(mp3_file):
-            raise Exception(f"Downloaded file not found: {mp3_file}")
-            
-        actual_filename = os.path.relpath(mp3_file, BASE_DIR)
-        
-        if duration == 0:
-            duration = get_audio_duration(mp3_file)
-        
-        return {
-            'title': info['title'],
-            'filename': actual_filename,
-            'duration': duration
-        }
+        return download_track(url)
     except Exception as e:
         logger.error(f"Error downloading single track from {url}: {e}")
         raise
 
-def download_playlist(url):
-    """Download all tracks from a YouTube playlist"""
+def check_download_cancelled(d):
+    """yt-dlp progress hook that aborts an in-flight download once the user cancels"""
+    if download_state.get('cancelled', False):
+        raise yt_dlp.utils.DownloadCancelled('Download cancelled by user')
+
+def download_playlist_entry(index, entry, total, progress):
+    """Download and transcode one playlist entry.
+
+    Runs inside the download pool; the DB insert is left to the caller so
+    songs are added in playlist order. Every entry, skipped or not, counts
+    towards progress['finished'].
+    """
+    video_title = f'Unknown Track {index}'
+    try:
+        if not entry:
+            return {'status': 'empty'}
+
+        # A malformed entry (no url and no id) fails on its own instead of aborting the playlist
+        video_url = entry.get('url') or f"https://www.youtube.com/watch?v={entry['id']}"
+        video_title = entry.get('title') or video_title
+        entry_id = entry.get('id') or video_url
+
+        if entry_id in progress['skip_entry_ids']:
+            return {'status': 'skipped', 'title': video_title, 'entry_id': entry_id}
+
+        if download_state.get('cancelled', False):
+            return {'status': 'cancelled', 'title': video_title}
+
+        logger.info(f"Downloading track {index}/{total}: {video_title}")
+        progress['active'][index] = video_title
+        emit_playlist_progress(progress, total, video_title)
+
+        song_info = download_track(video_url, fallback_title=video_title, skip_existing=True)
+        if song_info is None:
+            return {'status': 'skipped', 'title': video_title, 'entry_id': entry_id}
+
+        logger.info(f"Successfully downloaded: {song_info['title']}")
+        return dict(song_info, status='downloaded', entry_id=entry_id)
+    except yt_dlp.utils.DownloadCancelled:
+        logger.info(f"Download of track {index} cancelled: {video_title}")
+        return {'status': 'cancelled', 'title': video_title}
+    except Exception as e:
+        logger.error(f"Error downloading track {index} ({video_title}): {e}")
+        return {'status': 'failed', 'title': video_title, 'error': str(e)}
+    finally:
+        progress['active'].pop(index, None)
+        progress['finished'] += 1
+        emit_playlist_progress(progress, total, video_title)
+
+def emit_playlist_progress(progress, total, video_title):
+    """Report playlist progress; 'current' counts finished tracks across all workers"""
+    if download_state.get('cancelled', False):
+        return
+    current = min(progress['finished'] + 1, total)
+    in_flight = len(progress['active'])
+    message = f'Downloading track {current}/{total}'
+    if in_flight > 1:
+        message += f' ({in_flight} in parallel)'
+    set_download_state('downloading', message, current, total, video_title, progress['playlist_title'])
+    socketio.emit('download_progress', {
+        'status': 'downloading',
+        'message': message,
+        'current_song': video_title,
+        'current': current,
+        'total': total
+    })
+
+def add_downloaded_song(song_info, source):
+    """Insert a downloaded song at the end of the playlist and notify clients"""
+    with session_scope() as db_session:
+        try:
+            # Check if song with same filename already exists
+            existing_song = db_session.query(Song).filter_by(filename=song_info['filename']).first()
+            if not existing_song:
+                song = Song(
+                    title=song_info['title'],
+                    filename=song_info['filename'],
+                    source=source,
+                    duration=song_info['duration'],
+                    position=next_song_position(db_session)
+                )
+                db_session.add(song)
+                db_session.commit()
+                notify_song_added(song.id, song.category, song.priority)
+                request_stats_refresh()
+                loudness_wakeup.set()
+                logger.info(f"Added song to database immediately: {song_info['title']}")
+                
+                # Emit update to refresh UI
+                socketio.emit('song_added', {
+                    'title': song_info['title'],
+                    'message': f"Added song: {song_info['title']}",
+                    'song': serialize_song_row(song),
+                    'counts': get_song_counts(db_session)
+                })
+            else:
+                logger.info(f"Song already exists in database: {song_info['title']}")
+        except Exception as db_error:
+            logger.error(f"Error adding song to database: {song_info['title']} - {db_error}")
+
+def download_playlist(url, skip_entry_ids=(), on_entry_done=None):
+    """Download all tracks from a YouTube playlist.
+
+    Up to DOWNLOAD_WORKERS tracks are downloaded and transcoded at once. Results
+    are consumed in playlist order, so Song.position follows the playlist even
+    though tracks finish out of order. Entries in skip_entry_ids (finished by an
+    earlier, interrupted run) are skipped; on_entry_done(entry_id) is called as
+    each entry is stored.
+    """
     try:
         logger.info(f"Processing playlist: {url}")
         
@@ -974,151 +2507,75 @@ def download_playlist(url):
         if 'entries' not in playlist_info:
             raise Exception("Unable to extract song list from playlist")
             
-        entries = playlist_info['entries']
+        entries = list(playlist_info['entries'])
         if not entries:
             raise Exception("Playlist is empty or inaccessible")
             
         playlist_title = playlist_info.get('title', 'Unknown')
-        logger.info(f"Found {len(entries)} songs in playlist: {playlist_title}")
-        
+        total = len(entries)
+        logger.info(f"Found {total} songs in playlist: {playlist_title}")
         
         downloaded_songs = []
-        failed_downloads = []
-        
-        # Download each track individually
-        for i, entry in enumerate(entries, 1):
-            # Check if download has been cancelled
-            if download_state.get('cancelled', False):
-                logger.info("Download cancelled by user, stopping playlist download")
-                clear_download_state()
-                socketio.emit('download_progress', {
-                    'status': 'cancelled',
-                    'message': 'Download has been cancelled',
-                    'current': i-1,
-                    'total': len(entries)
-                })
-                return {
-                    'playlist_title': playlist_info.get('title', 'Unknown Playlist'),
-                    'total_tracks': len(entries),
-                    'downloaded_tracks': len(downloaded_songs),
-                    'failed_tracks': len(failed_downloads),
-                    'songs': downloaded_songs,
-                    'failed_songs': failed_downloads,
-                    'cancelled': True
-                }
-            
-            if not entry:
-                continue
-                
-            try:
-                video_url = entry.get('url') or f"https://www.youtube.com/watch?v={entry['id']}"
-                video_title = entry.get('title', f'Unknown Track {i}')
-                
-                logger.info(f"Downloading track {i}/{len(entries)}: {video_title}")
-                
-                # Update state and emit progress for current track
-                set_download_state('downloading', f'Downloading track {i}/{len(entries)}', i, len(entries), video_title, playlist_title)
-                socketio.emit('download_progress', {
-                    'status': 'downloading',
-                    'message': f'Downloading track {i}/{len(entries)}',
-                    'current_song': video_title,
-                    'current': i,
-                    'total': len(entries)
-                })
-                
-                
-                # Get detailed info for this specific video
-                ydl_opts_detail = {
-                    'quiet': True,
-                    'no_warnings': True
-                }
-                
-                with yt_dlp.YoutubeDL(ydl_opts_detail) as ydl_detail:
-                    video_info = ydl_detail.extract_info(video_url, download=False)
-                    duration = int(video_info.get('duration', 0))
-                    actual_title = video_info.get('title', video_title)
-                    
-                normalized_title = normalize_filename(actual_title)
-                
-                # Check if song already exists
-                mp3_file = os.path.join(MUSIC_DIR, f'{normalized_title}.mp3')
-                if os.path.exists(mp3_file):
-                    logger.info(f"Song already exists, skipping: {actual_title}")
-                    continue
-                
-                # Download the track
-                ydl_opts_download = {
-                    'format': 'bestaudio/best',
-                    'outtmpl': os.path.join(MUSIC_DIR, f'{normalized_title}.%(ext)s'),
-                    'postprocessors': [{
-                        'key': 'FFmpegExtractAudio',
-                        'preferredcodec': 'mp3',
-                        'preferredquality': '192',
-                    }],
-                    'quiet': True,
-                    'no_warnings': True
-                }
-                
-                with yt_dlp.YoutubeDL(ydl_opts_download) as ydl_download:
-                    ydl_download.download([video_url])
-                
-                if not os.path.exists(mp3_file):
-                    raise Exception(f"File was not created: {mp3_file}")
-                    
-                actual_filename = os.path.relpath(mp3_file, BASE_DIR)
-                
-                if duration == 0:
-                    duration = get_audio_duration(mp3_file)
-                
-                # Add song to database immediately after successful download
-                with session_scope() as db_session:
-                    try:
-                        # Check if song with same filename already exists
-                        existing_song = db_session.query(Song).filter_by(filename=actual_filename).first()
-                        if not existing_song:
-                            # Get max position and add 1
-                            max_position = db_session.query(db.func.max(Song.position)).scalar() or -1
-                            
-                            song = Song(
-                                title=actual_title,
-                                filename=actual_filename,
-                                source='youtube_playlist',
-                                duration=duration,
-                                position=max_position + 1
-                            )
-                            db_session.add(song)
-                            db_session.commit()
-                            logger.info(f"Added song to database immediately: {actual_title}")
-                            
-                            # Emit update to refresh UI
-                            socketio.emit('song_added', {
-                                'title': actual_title,
-                                'message': f'Added song: {actual_title}'
-                            })
-                        else:
-                            logger.info(f"Song already exists in database: {actual_title}")
-                    except Exception as db_error:
-                        logger.error(f"Error adding song to database: {actual_title} - {db_error}")
-                
+        failed_downloads = []
+        cancelled = False
+        progress = {
+            'finished': 0,
+            'active': {},
+            'playlist_title': playlist_title,
+            'skip_entry_ids': set(skip_entry_ids)
+        }
+        
+        # GreenPool.imap runs up to DOWNLOAD_WORKERS entries concurrently but yields results in order
+        pool = eventlet.GreenPool(app.config['DOWNLOAD_WORKERS'])
+        results = pool.imap(
+            download_playlist_entry,
+            range(1, total + 1),
+            entries,
+            [total] * total,
+            [progress] * total
+        )
+        for result in results:
+            status = result['status']
+            if status == 'downloaded':
+                add_downloaded_song(result, 'youtube_playlist')
                 downloaded_songs.append({
-                    'title': actual_title,
-                    'filename': actual_filename,
-                    'duration': duration
+                    'title': result['title'],
+                    'filename': result['filename'],
+                    'duration': result['duration']
                 })
-                
-                logger.info(f"Successfully downloaded: {actual_title}")
-                
-            except Exception as e:
-                logger.error(f"Error downloading track {i} ({video_title}): {e}")
+            elif status == 'failed':
                 failed_downloads.append({
-                    'title': video_title,
-                    'error': str(e)
+                    'title': result['title'],
+                    'error': result['error']
                 })
-                continue
+            elif status == 'cancelled':
+                cancelled = True
+            if status in ('downloaded', 'skipped') and on_entry_done:
+                on_entry_done(result['entry_id'])
+
+        # Check if download has been cancelled
+        if cancelled or download_state.get('cancelled', False):
+            logger.info("Download cancelled by user, stopped playlist download")
+            clear_download_state()
+            socketio.emit('download_progress', {
+                'status': 'cancelled',
+                'message': 'Download has been cancelled',
+                'current': progress['finished'],
+                'total': total
+            })
+            return {
+                'playlist_title': playlist_info.get('title', 'Unknown Playlist'),
+                'total_tracks': total,
+                'downloaded_tracks': len(downloaded_songs),
+                'failed_tracks': len(failed_downloads),
+                'songs': downloaded_songs,
+                'failed_songs': failed_downloads,
+                'cancelled': True
+            }
         
         result = {
             'playlist_title': playlist_info.get('title', 'Unknown Playlist'),
-            'total_tracks': len(entries),
+            'total_tracks': total,
             'downloaded_tracks': len(downloaded_songs),
             'failed_tracks': len(failed_downloads),
             'songs': downloaded_songs,
@@ -1144,17 +2601,346 @@ def download_playlist(url):
         logger.error(f"Error downloading playlist from {url}: {e}")
         raise
 
-def download_music(url):
+def download_music(url, skip_entry_ids=(), on_entry_done=None):
     """Main function to download music - handles both single tracks and playlists"""
     if is_playlist_url(url):
-        return download_playlist(url)
+        return download_playlist(url, skip_entry_ids, on_entry_done)
     else:
         return download_single_track(url)
 
+# =============================================================================
+# Download Job Queue
+# =============================================================================
+
+def serialize_download_job(job):
+    return {
+        'id': job.id,
+        'url': job.url,
+        'status': job.status,
+        'message': job.message or '',
+        'playlist_title': job.playlist_title,
+        'total_tracks': job.total_tracks or 0,
+        'downloaded_tracks': job.downloaded_tracks or 0,
+        'failed_tracks': job.failed_tracks or 0,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None
+    }
+
+def emit_download_job_update(job_id):
+    """Push the job's current status to all clients"""
+    try:
+        with app.app_context():
+            with session_scope() as session:
+                job = session.get(DownloadJob, job_id)
+                if job:
+                    socketio.emit('download_job_update', serialize_download_job(job))
+    except Exception as e:
+        logger.error(f"Error emitting download job {job_id}: {e}")
+
+def enqueue_download_job(url):
+    """Persist a download job and wake the worker; returns the job id"""
+    with session_scope() as session:
+        job = DownloadJob(url=url, status='queued', message='Queued')
+        session.add(job)
+        session.flush()
+        job_id = job.id
+    logger.info(f"Queued download job {job_id}: {url}")
+    download_job_wakeup.set()
+    emit_download_job_update(job_id)
+    return job_id
+
+def resume_interrupted_download_jobs():
+    """Requeue jobs that were running when the app stopped"""
+    try:
+        with session_scope() as session:
+            jobs = session.query(DownloadJob).filter_by(status='running').all()
+            for job in jobs:
+                job.status = 'queued'
+                job.message = 'Resuming after restart'
+            if jobs:
+                logger.info(f"Requeued {len(jobs)} interrupted download jobs")
+    except Exception as e:
+        logger.error(f"Error resuming download jobs: {e}")
+
+def claim_next_download_job():
+    """Mark the oldest queued job as running and return (id, url, done_entries)"""
+    with app.app_context():
+        with session_scope() as session:
+            job = session.query(DownloadJob).filter_by(status='queued').order_by(DownloadJob.id.asc()).first()
+            if not job:
+                return None
+            job.status = 'running'
+            job.message = 'Starting...'
+            job.started_at = datetime.utcnow()
+            return job.id, job.url, json.loads(job.done_entries or '[]')
+
+def mark_download_entry_done(job_id, entry_id):
+    """Record a finished playlist entry so a restarted job skips it"""
+    try:
+        with app.app_context():
+            with session_scope() as session:
+                job = session.get(DownloadJob, job_id)
+                if job:
+                    done = json.loads(job.done_entries or '[]')
+                    if entry_id not in done:
+                        done.append(entry_id)
+                        job.done_entries = json.dumps(done)
+    except Exception as e:
+        logger.error(f"Error recording finished entry for job {job_id}: {e}")
+
+def finish_download_job(job_id, status, message, playlist_info=None):
+    with app.app_context():
+        with session_scope() as session:
+            job = session.get(DownloadJob, job_id)
+            if not job:
+                return
+            # A queued-then-cancelled job keeps its cancelled status
+            if job.status != 'cancelled':
+                job.status = status
+            job.message = message[:500]
+            job.finished_at = datetime.utcnow()
+            if playlist_info:
+                job.playlist_title = playlist_info.get('playlist_title')
+                job.total_tracks = playlist_info.get('total_tracks', 0)
+                job.downloaded_tracks = playlist_info.get('downloaded_tracks', 0)
+                job.failed_tracks = playlist_info.get('failed_tracks', 0)
+    emit_download_job_update(job_id)
+
+def summarize_playlist_result(music_info):
+    """Return (status, message) for a finished playlist download"""
+    playlist_title = music_info['playlist_title']
+    downloaded_songs = music_info['songs']
+    failed_songs = music_info['failed_songs']
+
+    if music_info.get('cancelled', False):
+        return 'cancelled', f"Playlist download '{playlist_title}' was cancelled. Downloaded {len(downloaded_songs)} songs."
+
+    if not downloaded_songs and failed_songs:
+        return 'failed', f"Unable to download any songs from playlist '{playlist_title}'. Error: {len(failed_songs)} songs failed"
+
+    # Songs are already added to database during download process
+    message_parts = [f"Added {len(downloaded_songs)} songs from playlist '{playlist_title}'"]
+    if failed_songs:
+        message_parts.append(f"{len(failed_songs)} songs failed to download")
+    return 'completed', ". ".join(message_parts)
+
+def run_download_job(job_id, url, done_entries):
+    """Download one queued URL and record the outcome on its job row"""
+    logger.info(f"Running download job {job_id}: {url}")
+    clear_download_state()
+    emit_download_job_update(job_id)
+    try:
+        with app.app_context():
+            if is_playlist_url(url):
+                socketio.emit('download_progress', {
+                    'status': 'starting',
+                    'message': 'Starting playlist processing...',
+                    'current': 0,
+                    'total': 0
+                })
+                music_info = download_music(
+                    url,
+                    skip_entry_ids=done_entries,
+                    on_entry_done=lambda entry_id: mark_download_entry_done(job_id, entry_id)
+                )
+                status, message = summarize_playlist_result(music_info)
+                finish_download_job(job_id, status, message, {
+                    'playlist_title': music_info['playlist_title'],
+                    'total_tracks': music_info['total_tracks'],
+                    'downloaded_tracks': music_info['downloaded_tracks'],
+                    'failed_tracks': music_info['failed_tracks']
+                })
+                return
+
+            # Mark the download active so /cancel-download can abort it
+            set_download_state('downloading', 'Downloading track 1/1', 1, 1, url)
+            socketio.emit('download_progress', {
+                'status': 'downloading',
+                'message': 'Downloading track 1/1',
+                'current_song': url,
+                'current': 1,
+                'total': 1
+            })
+            try:
+                music_info = download_music(url)
+            finally:
+                cancelled = download_state.get('cancelled', False)
+                clear_download_state()
+                socketio.emit('download_progress', {
+                    'status': 'cancelled' if cancelled else 'completed',
+                    'message': 'Download has been cancelled' if cancelled else 'Download finished',
+                    'current': 1,
+                    'total': 1
+                })
+            if not music_info['duration']:
+                finish_download_job(job_id, 'failed', 'Could not determine video duration')
+                return
+
+            with session_scope() as session:
+                existing_song = session.query(Song).filter_by(filename=music_info['filename']).first()
+            if existing_song:
+                finish_download_job(job_id, 'failed', 'This song already exists in the playlist')
+                return
+
+            add_downloaded_song(music_info, 'youtube')
+            finish_download_job(job_id, 'completed', 'Music added successfully', {
+                'playlist_title': None,
+                'total_tracks': 1,
+                'downloaded_tracks': 1,
+                'failed_tracks': 0
+            })
+    except yt_dlp.utils.DownloadCancelled:
+        finish_download_job(job_id, 'cancelled', 'Download has been cancelled')
+    except Exception as e:
+        logger.error(f"Error in download job {job_id} ({url}): {e}")
+        finish_download_job(job_id, 'failed', str(e))
+
+def download_worker():
+    """Process queued download jobs one at a time, in order"""
+    while True:
+        try:
+            claimed = claim_next_download_job()
+            if claimed is None:
+                download_job_wakeup.wait()
+                download_job_wakeup.clear()
+                continue
+            run_download_job(*claimed)
+        except Exception as e:
+            logger.error(f"Error in download worker: {e}")
+            eventlet.sleep(5)
+
+def start_download_worker():
+    """Start the download worker background task once"""
+    global download_worker_started
+    if not download_worker_started:
+        download_worker_started = True
+        socketio.start_background_task(download_worker)
+
+def serialize_song_row(row):
+    """Slim song projection used by the playlist listing"""
+    return {
+        'id': row.id,
+        'title': row.title,
+        'duration': row.duration,
+        'source': row.source,
+        'position': row.position,
+        'category': row.category or 'music',
+        'delete_after_play': row.delete_after_play or False,
+        'last_played_at': row.last_played_at.isoformat() if row.last_played_at else None,
+        'priority': row.priority
+    }
+
+def get_song_counts(session):
+    """Library-wide counts for the playlist tabs, from one grouped query"""
+    counts = {'total': 0, 'music': 0, 'announcement': 0, 'played': 0, 'unplayed': 0}
+    unplayed = Song.last_played_at.is_(None)
+    rows = session.query(Song.category, unplayed, db.func.count(Song.id)).group_by(Song.category, unplayed).all()
+    for category, is_unplayed, count in rows:
+        counts['total'] += count
+        counts['announcement' if category == 'announcement' else 'music'] += count
+        counts['unplayed' if is_unplayed else 'played'] += count
+    return counts
+
+def parse_song_filters(args):
+    """Validate /api/songs query arguments. Raises ValueError on bad input."""
+    filters = {}
+
+    category = args.get('category')
+    if category and category != 'all':
+        if category not in ('music', 'announcement'):
+            raise ValueError('category must be music, announcement or all')
+        filters['category'] = category
+
+    search = args.get('q', '').strip()
+    if search:
+        filters['search'] = search
+
+    played = args.get('played')
+    if played:
+        if played not in ('true', 'false'):
+            raise ValueError('played must be true or false')
+        filters['played'] = played == 'true'
+
+    cursor = args.get('cursor')
+    if cursor:
+        try:
+            position, song_id = cursor.split(':')
+            filters['cursor'] = (int(position), int(song_id))
+        except ValueError:
+            raise ValueError('Invalid cursor')
+
+    try:
+        limit = int(args.get('limit', SONG_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    filters['limit'] = max(1, min(limit, SONG_PAGE_MAX))
+    return filters
+
+def query_song_page(session, category=None, search=None, played=None, cursor=None, limit=SONG_PAGE_SIZE):
+    """One playlist page in (position, id) order, keyset-paginated. Returns (rows, next_cursor)."""
+    query = session.query(
+        Song.id, Song.title, Song.duration, Song.source, Song.position,
+        Song.category, Song.delete_after_play, Song.last_played_at, Song.priority
+    )
+    if category == 'music':
+        query = query.filter(db.or_(Song.category == 'music', Song.category.is_(None)))
+    elif category:
+        query = query.filter(Song.category == category)
+    if search:
+        query = query.filter(Song.title.contains(search, autoescape=True))
+    if played is not None:
+        query = query.filter(Song.last_played_at.isnot(None) if played else Song.last_played_at.is_(None))
+    if cursor:
+        position, song_id = cursor
+        query = query.filter(db.or_(
+            Song.position > position,
+            db.and_(Song.position == position, Song.id > song_id)
+        ))
+
+    rows = query.order_by(Song.position.asc(), Song.id.asc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = f"{rows[-1].position}:{rows[-1].id}"
+    return rows, next_cursor
+
 # =============================================================================
 # API Endpoints for React Frontend
 # =============================================================================
 
+@app.route('/api/songs')
+@login_required
+def api_songs():
+    """One page of the playlist. Query args: category, q, played, cursor, limit.
+
+    Library counts are included on the first page (no cursor). Responses carry
+    an ETag, so an unchanged page is answered with 304.
+    """
+    try:
+        filters = parse_song_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        with session_scope() as db_session:
+            rows, next_cursor = query_song_page(db_session, **filters)
+            payload = {
+                'songs': [serialize_song_row(row) for row in rows],
+                'next_cursor': next_cursor
+            }
+            if 'cursor' not in filters:
+                payload['counts'] = get_song_counts(db_session)
+    except Exception as e:
+        logger.error(f"Error listing songs: {e}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+    response = jsonify(payload)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.add_etag()
+    return response.make_conditional(request)
+
 @app.route('/api/initial-state')
 def api_initial_state():
     """API endpoint to get all initial state for React frontend"""
@@ -1168,6 +2954,8 @@ def api_initial_state():
                 'is_authenticated': False,
                 'username': '',
                 'songs': [],
+                'songs_next_cursor': None,
+                'song_counts': None,
                 'schedules': [],
                 'is_playing': False,
                 'current_song_id': None,
@@ -1185,30 +2973,14 @@ def api_initial_state():
                 'ytdlp_version': ''
             })
         
-        disk_usage_info = get_disk_usage()
+        stats = get_system_stats()
+        next_schedule_info = get_next_schedule_info()
         
         with session_scope() as db_session:
-            # Get songs
-            songs = db_session.query(Song).order_by(
-                Song.position.asc(),
-                Song.last_played_at.is_(None).desc(),
-                Song.priority.desc(),
-                Song.last_played_at.asc()
-            ).all()
-            
-            songs_data = [{
-                'id': s.id,
-                'title': s.title,
-                'duration': s.duration,
-                'source': s.source,
-                'file_path': s.filename,
-                'position': s.position,
-                'category': s.category or 'music',
-                'delete_after_play': s.delete_after_play or False,
-                'last_played_at': s.last_played_at.isoformat() if s.last_played_at else None,
-                'priority': s.priority,
-                'created_at': s.created_at.isoformat() if s.created_at else None
-            } for s in songs]
+            # First page of songs only; the client pages through /api/songs for the rest
+            song_rows, songs_next_cursor = query_song_page(db_session)
+            songs_data = [serialize_song_row(row) for row in song_rows]
+            song_counts = get_song_counts(db_session)
             
             # Get schedules
             schedules = db_session.query(Schedule).order_by(Schedule.time).all()
@@ -1228,54 +3000,14 @@ def api_initial_state():
                 'sunday': s.sunday
             } for s in schedules]
             
-            # Get next schedule info
-            now = datetime.now()
-            current_time = now.strftime("%H:%M")
-            weekday = now.strftime("%A").lower()
-            
-            next_schedules = db_session.query(Schedule).filter(
-                Schedule.time > current_time,
-                Schedule.enabled == True
-            ).order_by(Schedule.time).all()
-            
-            if not next_schedules:
-                next_schedules = db_session.query(Schedule).filter(
-                    Schedule.enabled == True
-                ).order_by(Schedule.time).all()
-            
-            next_schedule_info = None
-            valid_schedules = [s for s in next_schedules if getattr(s, weekday)]
-            
-            if valid_schedules:
-                next_schedule = valid_schedules[0]
-                # Filter songs by schedule's song_category
-                song_query = db_session.query(Song)
-                if next_schedule.song_category and next_schedule.song_category != 'all':
-                    song_query = song_query.filter(Song.category == next_schedule.song_category)
-                next_song_to_play = song_query.order_by(
-                    Song.position.asc(),
-                    Song.last_played_at.is_(None).desc(),
-                    Song.priority.desc(),
-                    Song.last_played_at.asc()
-                ).first()
-                
-                next_schedule_info = {
-                    'time': next_schedule.time,
-                    'song_title': next_song_to_play.title if next_song_to_play else 'Không có bài hát',
-                    'song_category': next_schedule.song_category or 'music'
-                }
-            
-            # Get current song title
-            current_song_title = None
-            if current_song_id:
-                current_song = db_session.get(Song, current_song_id)
-                if current_song:
-                    current_song_title = current_song.title
+            current_song_title = get_now_playing_title()
             
             return jsonify({
                 'is_authenticated': True,
                 'username': username,
                 'songs': songs_data,
+                'songs_next_cursor': songs_next_cursor,
+                'song_counts': song_counts,
                 'schedules': schedules_data,
                 'is_playing': is_playing,
                 'current_song_id': current_song_id,
@@ -1283,19 +3015,9 @@ def api_initial_state():
                 'volume': int(volume * 100),
                 'download_state': get_download_state(),
                 'next_schedule': next_schedule_info,
-                'disk_usage': {
-                    'used': disk_usage_info.get('used_gb', 0) * 1024 * 1024 * 1024,
-                    'total': disk_usage_info.get('total_gb', 0) * 1024 * 1024 * 1024,
-                    'percent': disk_usage_info.get('percentage_used', 0),
-                    'used_formatted': f"{disk_usage_info.get('used_gb', 0):.2f} GB",
-                    'total_formatted': f"{disk_usage_info.get('total_gb', 0):.2f} GB"
-                },
+                'disk_usage': format_disk_usage(stats),
                 'ytdlp_version': get_ytdlp_version(),
-                'settings': {
-                    'shuffle_mode': shuffle_mode,
-                    'fade_enabled': fade_enabled,
-                    'fade_duration': fade_duration
-                }
+                'settings': get_playback_settings()
             })
             
     except Exception as e:
@@ -1395,7 +3117,7 @@ def apply_volume(value):
         percent_value = int(float(value))
         percent_value = max(0, min(100, percent_value))
         volume = percent_value / 100.0
-        pygame.mixer.music.set_volume(volume)
+        set_music_volume(song_volume())
         return True, volume
     except (ValueError, TypeError) as e:
         logger.error(f"Invalid volume value: {value}")
@@ -1406,6 +3128,7 @@ def apply_volume(value):
 def set_volume(value):
     success, result = apply_volume(value)
     if success:
+        notify_playback_changed()
         return jsonify({'success': True, 'volume': result})
     else:
         return jsonify({
@@ -1482,8 +3205,8 @@ def add_schedule():
                 'sunday': schedule.sunday
             }
 
-        # Reload schedules after the database transaction is committed
-        schedule_music()
+        # Sync this schedule's job after the database transaction is committed
+        schedule_music([schedule_data['id']])
         
         # Broadcast updated next schedule to all clients
         broadcast_next_schedule()
@@ -1509,8 +3232,8 @@ def toggle_schedule(id):
             else:
                 return jsonify({'success': False, 'message': 'Schedule not found'}), 404
         
-        # Reload schedules after the database transaction is committed
-        schedule_music()
+        # Sync this schedule's job after the database transaction is committed
+        schedule_music([id])
         
         # Broadcast updated next schedule to all clients
         broadcast_next_schedule()
@@ -1533,8 +3256,8 @@ def delete_schedule(id):
             else:
                 return jsonify({'success': False, 'message': 'Schedule not found'}), 404
         
-        # Reload schedules after the database transaction is committed
-        schedule_music()
+        # Sync this schedule's job after the database transaction is committed
+        schedule_music([id])
         
         # Broadcast updated next schedule to all clients
         broadcast_next_schedule()
@@ -1559,94 +3282,70 @@ def add_music():
         return jsonify({'success': False, 'message': 'No URL provided'}), 400
 
     try:
-        # Check if it's a playlist to start progress tracking
-        if is_playlist_url(url):
-            socketio.emit('download_progress', {
-                'status': 'starting',
-                'message': 'Starting playlist processing...',
-                'current': 0,
-                'total': 0
-            })
-        
-        music_info = download_music(url)
-        
-        # Handle playlist response
-        if 'songs' in music_info:  # This is a playlist
-            playlist_title = music_info['playlist_title']
-            downloaded_songs = music_info['songs']
-            failed_songs = music_info['failed_songs']
-            cancelled = music_info.get('cancelled', False)
-            
-            if cancelled:
-                return jsonify({
-                    'success': True,
-                    'message': f"Playlist download '{playlist_title}' was cancelled. Downloaded {len(downloaded_songs)} songs.",
-                    'cancelled': True
-                })
-            
-            if not downloaded_songs:
-                error_msg = f"Unable to download any songs from playlist '{playlist_title}'"
-                if failed_songs:
-                    error_msg += f". Error: {len(failed_songs)} songs failed"
-                return jsonify({'success': False, 'message': error_msg}), 400
-            
-            # Songs are already added to database during download process
-            # Just count them for response
-            added_songs = [song['title'] for song in downloaded_songs]
-            skipped_songs = []
-            
-            logger.info(f"Playlist processing completed: {len(added_songs)} songs were added during download")
-            
-            # Create response message
-            message_parts = []
-            if added_songs:
-                message_parts.append(f"Added {len(added_songs)} songs from playlist '{playlist_title}'")
-            if skipped_songs:
-                message_parts.append(f"{len(skipped_songs)} songs already exist in playlist")
-            if failed_songs:
-                message_parts.append(f"{len(failed_songs)} songs failed to download")
-            
-            response_message = ". ".join(message_parts)
-            
-            return jsonify({
-                'success': True,
-                'message': response_message,
-                'playlist_info': {
-                    'playlist_title': playlist_title,
-                    'total_tracks': music_info['total_tracks'],
-                    'added_tracks': len(added_songs),
-                    'skipped_tracks': len(skipped_songs),
-                    'failed_tracks': len(failed_songs)
-                }
-            })
-            
-        else:  # This is a single track
-            if not music_info['duration']:
-                return jsonify({'success': False, 'message': 'Could not determine video duration'})
-                
-            with session_scope() as session:
-                # Check if song with same filename already exists
-                existing_song = session.query(Song).filter_by(filename=music_info['filename']).first()
-                if existing_song:
-                    return jsonify({'success': False, 'message': 'This song already exists in the playlist'}), 400
-
-                # Get max position and add 1
-                max_position = session.query(db.func.max(Song.position)).scalar() or -1
-                
-                song = Song(
-                    title=music_info['title'],
-                    filename=music_info['filename'],
-                    source='youtube',
-                    duration=music_info['duration'],
-                    position=max_position + 1
-                )
-                session.add(song)
-                return jsonify({'success': True, 'message': 'Music added successfully'})
-                
+        # Downloads run in the background worker; the request returns at once
+        job_id = enqueue_download_job(url)
+        return jsonify({
+            'success': True,
+            'message': 'Download queued',
+            'job_id': job_id,
+            'status_url': url_for('download_job_status', id=job_id)
+        }), 202
     except Exception as e:
-        logger.error(f"Error adding music from URL {url}: {e}")
+        logger.error(f"Error queueing music from URL {url}: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/download-jobs')
+@login_required
+def download_jobs():
+    """List recent download jobs, newest first"""
+    try:
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        with session_scope() as session:
+            jobs = session.query(DownloadJob).order_by(DownloadJob.id.desc()).limit(limit).all()
+            return jsonify({'success': True, 'jobs': [serialize_download_job(job) for job in jobs]})
+    except Exception as e:
+        logger.error(f"Error listing download jobs: {e}")
+        return jsonify({'success': False, 'message': 'Error retrieving download jobs'}), 500
+
+@app.route('/api/download-jobs/<int:id>')
+@login_required
+def download_job_status(id):
+    """Status of a single download job"""
+    try:
+        with session_scope() as session:
+            job = session.get(DownloadJob, id)
+            if not job:
+                return jsonify({'success': False, 'message': 'Job not found'}), 404
+            return jsonify({'success': True, 'job': serialize_download_job(job)})
+    except Exception as e:
+        logger.error(f"Error getting download job {id}: {e}")
+        return jsonify({'success': False, 'message': 'Error retrieving download job'}), 500
+
+@app.route('/api/download-jobs/<int:id>/cancel', methods=['POST'])
+@login_required
+@csrf.exempt
+def cancel_download_job(id):
+    """Cancel a queued job, or the running one"""
+    try:
+        with session_scope() as session:
+            job = session.get(DownloadJob, id)
+            if not job:
+                return jsonify({'success': False, 'message': 'Job not found'}), 404
+            if job.status not in ('queued', 'running'):
+                return jsonify({'success': False, 'message': 'Job already finished'}), 400
+            was_running = job.status == 'running'
+            job.status = 'cancelled'
+            job.message = 'Cancelled by user'
+            if not was_running:
+                job.finished_at = datetime.utcnow()
+        if was_running:
+            cancel_download()
+        emit_download_job_update(id)
+        return jsonify({'success': True})
+    except Exception as e:
+        logger.error(f"Error cancelling download job {id}: {e}")
+        return jsonify({'success': False, 'message': 'Error cancelling download job'}), 500
+
 @app.route('/upload-music', methods=['POST'])
 @csrf.exempt
 @login_required
@@ -1673,28 +3372,34 @@ def upload_music():
                 return jsonify({'success': False, 'message': 'A file with this name already exists'}), 400
 
             file.save(full_filepath)
+            index_music_file(filepath)
             duration = get_audio_duration(full_filepath)
             
             if duration == 0:
                 os.remove(full_filepath)
+                unindex_music_file(filepath)
                 return jsonify({'success': False, 'message': 'Could not determine audio duration'}), 400
 
-            # Get max position and add 1
-            max_position = session.query(db.func.max(Song.position)).scalar() or -1
-            
             song = Song(
                 title=os.path.splitext(filename)[0],
                 filename=filepath,
                 source='upload',
                 duration=duration,
-                position=max_position + 1
+                position=next_song_position(session)
             )
             session.add(song)
-            return jsonify({'success': True, 'message': 'File uploaded successfully'})
+            session.flush()
+            added = (song.id, song.category, song.priority)
+        # Only once the insert is committed, so selection state, the refresh and the loudness worker see the song
+        notify_song_added(*added)
+        request_stats_refresh()
+        loudness_wakeup.set()
+        return jsonify({'success': True, 'message': 'File uploaded successfully'})
     except Exception as e:
         logger.error(f"Error uploading file {file.filename}: {e}")
         if os.path.exists(full_filepath):
             os.remove(full_filepath)
+            unindex_music_file(full_filepath)
         return jsonify({'success': False, 'message': 'Error uploading file'}), 500
 
 @app.route('/update-ytdlp', methods=['POST'])
@@ -1707,8 +3412,6 @@ def update_ytdlp_manual():
         update_ytdlp()
         
         # Reload yt_dlp module to use new version without restarting server
-        import importlib
-        import yt_dlp
         importlib.reload(yt_dlp)
         logger.info("yt-dlp module reloaded successfully")
         
@@ -1724,8 +3427,28 @@ def update_ytdlp_manual():
 @csrf.exempt
 def play(id):
     success = play_music(id)
+    if success:
+        schedule_next_preload()
     return jsonify({'success': success})
 
+@socketio.on('connect')
+def handle_connect():
+    """Track connected clients and wake the playback monitor for heartbeats"""
+    global connected_clients
+    connected_clients += 1
+    playback_wakeup.set()
+    if 'user_id' in session:
+        try:
+            emit('playback_update', get_playback_state())
+        except Exception as e:
+            logger.error(f"Error sending playback state on connect: {e}")
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    """Track connected clients so heartbeats stop when nobody is listening"""
+    global connected_clients
+    connected_clients = max(0, connected_clients - 1)
+
 @socketio.on('toggle_play_pause')
 @socketio_login_required
 def handle_toggle_play_pause():
@@ -1733,22 +3456,23 @@ def handle_toggle_play_pause():
     try:
         logger.info(f"Toggle play/pause - current state: is_playing={is_playing}, current_position={current_position}, current_song_id={current_song_id}")
         
-        if pygame.mixer.music.get_busy():
+        if pygame.mixer.music.get_busy() or crossfade_channel.get_busy():
             logger.info("Music is playing, attempting to pause")
+            complete_fade()  # Finish a pending switch first so the new track is the one paused
             pos = pygame.mixer.music.get_pos()
             logger.info(f"Current position from pygame: {pos}")
             if pos >= 0:
                 current_position = pos / 1000
             pygame.mixer.music.pause()
             is_playing = False
-            broadcast_playback_state()
+            notify_playback_changed()
             logger.info("Successfully paused music")
         elif current_song_id:
             logger.info("Music is paused, attempting to resume")
             try:
                 pygame.mixer.music.unpause()
                 is_playing = True
-                broadcast_playback_state()
+                notify_playback_changed()
                 logger.info("Successfully resumed music")
             except Exception as e:
                 logger.error(f"Error during resume: {e}")
@@ -1767,15 +3491,18 @@ def handle_stop():
         music_active = pygame.mixer.music.get_busy() or is_playing or current_song_id is not None
         if music_active:
             # Use fade out if enabled and actually playing (not paused)
+            cancel_crossfade()
             if fade_enabled and pygame.mixer.music.get_busy():
-                fade_out()
+                start_fade(0, fade_duration, then=stop_and_restore_volume)
             else:
+                cancel_fade()
                 pygame.mixer.music.stop()
             current_song_id = None
             current_song_duration = 0
             is_playing = False
             current_position = 0
-            broadcast_playback_state()
+            clear_now_playing()
+            notify_playback_changed()
             emit('music_stopped')
     except Exception as e:
         logger.error(f"Error stopping music: {e}")
@@ -1789,19 +3516,34 @@ def handle_stop():
 @socketio_login_required
 def handle_toggle_shuffle():
     """Toggle shuffle mode on/off"""
-    global shuffle_mode
-    try:
-        shuffle_mode = not shuffle_mode
-        logger.info(f"Shuffle mode: {shuffle_mode}")
-        socketio.emit('settings_updated', {
-            'shuffle_mode': shuffle_mode,
-            'fade_enabled': fade_enabled,
-            'fade_duration': fade_duration
-        })
+    global selection_mode
+    try:
+        selection_mode = 'playlist' if selection_mode == 'shuffle' else 'shuffle'
+        logger.info(f"Selection mode: {selection_mode}")
+        socketio.emit('settings_updated', get_playback_settings())
+        schedule_next_preload()
     except Exception as e:
         logger.error(f"Error toggling shuffle: {e}")
         emit('error', {'message': 'Error toggling shuffle'})
 
+@socketio.on('set_selection_mode')
+@socketio_login_required
+def handle_set_selection_mode(data):
+    """Choose how scheduled playback picks songs: playlist, shuffle or weighted"""
+    global selection_mode
+    try:
+        mode = data.get('mode')
+        if mode not in SELECTION_MODES:
+            emit('error', {'message': f'Selection mode must be one of: {", ".join(SELECTION_MODES)}'})
+            return
+        selection_mode = mode
+        logger.info(f"Selection mode: {selection_mode}")
+        socketio.emit('settings_updated', get_playback_settings())
+        schedule_next_preload()
+    except Exception as e:
+        logger.error(f"Error setting selection mode: {e}")
+        emit('error', {'message': 'Error setting selection mode'})
+
 @socketio.on('toggle_fade')
 @socketio_login_required
 def handle_toggle_fade():
@@ -1810,15 +3552,24 @@ def handle_toggle_fade():
     try:
         fade_enabled = not fade_enabled
         logger.info(f"Fade enabled: {fade_enabled}")
-        socketio.emit('settings_updated', {
-            'shuffle_mode': shuffle_mode,
-            'fade_enabled': fade_enabled,
-            'fade_duration': fade_duration
-        })
+        socketio.emit('settings_updated', get_playback_settings())
     except Exception as e:
         logger.error(f"Error toggling fade: {e}")
         emit('error', {'message': 'Error toggling fade'})
 
+@socketio.on('toggle_crossfade')
+@socketio_login_required
+def handle_toggle_crossfade():
+    """Toggle crossfading between consecutive tracks"""
+    global crossfade_enabled
+    try:
+        crossfade_enabled = not crossfade_enabled
+        logger.info(f"Crossfade enabled: {crossfade_enabled}")
+        socketio.emit('settings_updated', get_playback_settings())
+    except Exception as e:
+        logger.error(f"Error toggling crossfade: {e}")
+        emit('error', {'message': 'Error toggling crossfade'})
+
 @socketio.on('set_fade_duration')
 @socketio_login_required
 def handle_set_fade_duration(data):
@@ -1829,11 +3580,7 @@ def handle_set_fade_duration(data):
         if 0.5 <= new_duration <= 10.0:
             fade_duration = new_duration
             logger.info(f"Fade duration set to: {fade_duration}s")
-            socketio.emit('settings_updated', {
-                'shuffle_mode': shuffle_mode,
-                'fade_enabled': fade_enabled,
-                'fade_duration': fade_duration
-            })
+            socketio.emit('settings_updated', get_playback_settings())
         else:
             emit('error', {'message': 'Fade duration must be between 0.5 and 10 seconds'})
     except Exception as e:
@@ -1855,59 +3602,56 @@ def seek():
         
         logger.info(f"Seek requested to position: {position}")
         
-        if not current_song_id:
+        current_song = now_playing
+        if not current_song_id or not current_song or current_song.id != current_song_id:
             return jsonify({'success': False, 'message': 'No song is currently loaded'}), 400
 
-        with session_scope() as session:
-            current_song = session.get(Song, current_song_id)
-            if not current_song:
-                return jsonify({'success': False, 'message': 'Song not found in database'}), 404
-
-            if not (0 <= position <= current_song.duration):
-                return jsonify({'success': False, 'message': 'Invalid position'}), 400
+        if not (0 <= position <= current_song.duration):
+            return jsonify({'success': False, 'message': 'Invalid position'}), 400
 
-            # Reload and play from position
-            actual_filename = find_actual_file(current_song.filename)
-            file_path = os.path.join(BASE_DIR, actual_filename)
-            
-            logger.info(f"Seeking in file: {file_path}")
+        # Reload and play from position
+        file_path = current_song.file_path
         
-            if not os.path.exists(file_path):
-                return jsonify({'success': False, 'message': 'Song file not found'}), 404
+        logger.info(f"Seeking in file: {file_path}")
+    
+        if not os.path.exists(file_path):
+            return jsonify({'success': False, 'message': 'Song file not found'}), 404
 
-            # Stop current playback
+        # Stop current playback; a fade in progress ends here at full volume
+        cancel_fade()
+        cancel_crossfade()
+        pygame.mixer.music.stop()
+        pygame.mixer.music.unload()
+        
+        # Reload the file
+        run_blocking(pygame.mixer.music.load, file_path)
+        
+        # For MP3 files, use play with start parameter
+        # Convert to float for pygame
+        seek_position = float(position)
+        logger.info(f"Starting playback at position: {seek_position}")
+        
+        # Set seek_offset before playing
+        global seek_offset
+        seek_offset = seek_position
+        
+        # Play from the beginning first
+        pygame.mixer.music.play()
+        
+        # Then seek to position (works better with MP3)
+        try:
+            pygame.mixer.music.rewind()
+            pygame.mixer.music.set_pos(seek_position)
+            logger.info(f"set_pos successful to {seek_position}, seek_offset set to {seek_offset}")
+        except Exception as seek_error:
+            logger.warning(f"set_pos failed: {seek_error}, trying play with start")
             pygame.mixer.music.stop()
-            pygame.mixer.music.unload()
-            
-            # Reload the file
-            pygame.mixer.music.load(file_path)
-            
-            # For MP3 files, use play with start parameter
-            # Convert to float for pygame
-            seek_position = float(position)
-            logger.info(f"Starting playback at position: {seek_position}")
-            
-            # Set seek_offset before playing
-            global seek_offset
-            seek_offset = seek_position
-            
-            # Play from the beginning first
-            pygame.mixer.music.play()
-            
-            # Then seek to position (works better with MP3)
-            try:
-                pygame.mixer.music.rewind()
-                pygame.mixer.music.set_pos(seek_position)
-                logger.info(f"set_pos successful to {seek_position}, seek_offset set to {seek_offset}")
-            except Exception as seek_error:
-                logger.warning(f"set_pos failed: {seek_error}, trying play with start")
-                pygame.mixer.music.stop()
-                pygame.mixer.music.play(start=seek_position)
-            
-            current_position = seek_position
-            is_playing = True
+            pygame.mixer.music.play(start=seek_position)
         
-        broadcast_playback_state()
+        current_position = seek_position
+        is_playing = True
+    
+        notify_playback_changed()
         
         return jsonify({'success': True, 'position': current_position})
     except Exception as e:
@@ -1927,19 +3671,26 @@ def delete_song(id):
                 
             # Stop playback if this is the current song
             if current_song_id == id:
+                cancel_fade()
+                cancel_crossfade()
                 pygame.mixer.music.stop()
                 current_song_id = None
                 current_song_duration = 0
                 is_playing = False
                 current_position = 0
-                broadcast_playback_state()
+                clear_now_playing(id)
+                notify_playback_changed()
 
             actual_filename = find_actual_file(song.filename)
             filepath = os.path.join(BASE_DIR, actual_filename)
             if os.path.exists(filepath):
                 os.remove(filepath)
+            unindex_music_file(actual_filename)
+            stream_paths.pop(id, None)
             session.delete(song)
-            return jsonify({'success': True})
+        notify_song_removed(id)
+        request_stats_refresh()
+        return jsonify({'success': True})
     except Exception as e:
         logger.error(f"Error deleting song {id}: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -1961,21 +3712,54 @@ def update_song_category(id):
             if not song:
                 return jsonify({'success': False, 'message': 'Song not found'}), 404
             
+            old_category, priority = song.category, song.priority
             song.category = category
+            update_now_playing(id, category=category)
             logger.info(f"Updated song {id} category to {category}")
-            
-            return jsonify({
-                'success': True,
-                'song': {
-                    'id': song.id,
-                    'title': song.title,
-                    'category': song.category
-                }
-            })
+            song_row = {
+                'id': song.id,
+                'title': song.title,
+                'category': song.category
+            }
+        notify_song_recategorized(id, old_category, category, priority)
+        request_stats_refresh()
+        return jsonify({'success': True, 'song': song_row})
     except Exception as e:
         logger.error(f"Error updating song category {id}: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/update-song-priority/<int:id>', methods=['POST'])
+@login_required
+@csrf.exempt
+def update_song_priority(id):
+    """Set a song's priority (0 = normal; higher plays more often in weighted mode)"""
+    try:
+        data = request.get_json()
+        try:
+            priority = int(data.get('priority', 0))
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'Priority must be an integer'}), 400
+        if not 0 <= priority <= 10:
+            return jsonify({'success': False, 'message': 'Priority must be between 0 and 10'}), 400
+
+        with session_scope() as session:
+            song = session.get(Song, id)
+            if not song:
+                return jsonify({'success': False, 'message': 'Song not found'}), 404
+
+            song.priority = priority
+            logger.info(f"Updated song {id} priority to {priority}")
+            song_row = {
+                'id': song.id,
+                'title': song.title,
+                'priority': song.priority
+            }
+        notify_song_priority_changed(id, priority)  # After the commit, so the index matches the DB
+        return jsonify({'success': True, 'song': song_row})
+    except Exception as e:
+        logger.error(f"Error updating song priority {id}: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @app.route('/toggle-delete-after-play/<int:id>', methods=['POST'])
 @login_required
 @csrf.exempt
@@ -1988,6 +3772,7 @@ def toggle_delete_after_play(id):
                 return jsonify({'success': False, 'message': 'Song not found'}), 404
             
             song.delete_after_play = not song.delete_after_play
+            update_now_playing(id, delete_after_play=song.delete_after_play)
             logger.info(f"Toggled delete_after_play for song {id}: {song.delete_after_play}")
             
             return jsonify({
@@ -2002,16 +3787,164 @@ def toggle_delete_after_play(id):
         logger.error(f"Error toggling delete_after_play for song {id}: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+def resolve_stream_file(song_id):
+    """(path, stat) for a song's audio file, or (None, None) if the song or file is gone"""
+    path = stream_paths.get(song_id)
+    if path:
+        try:
+            return path, os.stat(path)
+        except FileNotFoundError:
+            stream_paths.pop(song_id, None)
+
+    with session_scope() as session:
+        song = session.get(Song, song_id)
+        if not song:
+            return None, None
+        path = os.path.join(BASE_DIR, find_actual_file(song.filename))
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None, None
+    stream_paths[song_id] = path
+    return path, st
+
+def transcode_cache_path(song_id, st, profile):
+    """Cache file for a rendition; keyed on the source's size and mtime so a replaced file is re-encoded"""
+    return os.path.join(
+        TRANSCODE_CACHE_DIR,
+        f"{song_id}-{st.st_size:x}-{st.st_mtime_ns:x}-{profile}.{TRANSCODE_PROFILES[profile]['ext']}"
+    )
+
+def prune_transcode_cache():
+    """Evict least recently served (by atime) renditions until the cache fits TRANSCODE_CACHE_MAX_BYTES"""
+    try:
+        entries = []
+        now = time.time()
+        with os.scandir(TRANSCODE_CACHE_DIR) as it:
+            for entry in it:
+                st = entry.stat()
+                if entry.name.endswith('.part'):
+                    if now - st.st_mtime > TRANSCODE_STALE_PART_SECONDS:
+                        os.remove(entry.path)
+                    continue
+                entries.append((st.st_atime, st.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= app.config['TRANSCODE_CACHE_MAX_BYTES']:
+                break
+            os.remove(path)
+            total -= size
+            logger.info(f"Evicted transcode cache entry {os.path.basename(path)}")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.error(f"Error pruning transcode cache: {e}")
+
+def start_transcode(source_path, profile):
+    """Start FFmpeg and wait for its first output, so a failure can still become an error response.
+
+    Returns (process, first_chunk). Raises OSError if FFmpeg cannot be run and
+    RuntimeError if it exits without producing output.
+    """
+    process = subprocess.Popen(
+        ['ffmpeg', '-v', 'error', '-i', source_path, '-vn', '-map_metadata', '-1',
+         *TRANSCODE_PROFILES[profile]['args'], 'pipe:1'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    first_chunk = process.stdout.read(STREAM_BLOCK_SIZE)
+    if not first_chunk:
+        returncode = process.wait()
+        process.stdout.close()
+        raise RuntimeError(f"FFmpeg exited with {returncode} before producing output")
+    return process, first_chunk
+
+def stop_transcode(process):
+    """Kill FFmpeg if it is still running and release its pipe"""
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+    process.stdout.close()
+
+def stream_transcode(process, first_chunk, source_path, cache_path, profile):
+    """Yield FFmpeg output as it is produced, keeping a copy that becomes the cache entry on success"""
+    os.makedirs(TRANSCODE_CACHE_DIR, exist_ok=True)
+    part_path = f"{cache_path}.{secrets.token_hex(4)}.part"
+    completed = False
+    try:
+        with open(part_path, 'wb') as part:
+            chunk = first_chunk
+            while chunk:
+                part.write(chunk)
+                yield chunk
+                chunk = process.stdout.read(STREAM_BLOCK_SIZE)
+        completed = process.wait() == 0
+        if completed:
+            os.replace(part_path, cache_path)
+            prune_transcode_cache()
+        else:
+            logger.error(f"FFmpeg failed to transcode {source_path} ({profile})")
+    finally:
+        # Client went away or FFmpeg failed: stop the encoder and drop the partial file
+        stop_transcode(process)
+        if not completed and os.path.exists(part_path):
+            os.remove(part_path)
+
 @app.route('/stream/<int:id>')
 @login_required
 def stream(id):
+    """Serve a song's file with Range/206, a strong ETag and Cache-Control.
+
+    ?profile=low (Opus) or ?profile=low-aac serves a low-bitrate rendition.
+    The first request streams it from FFmpeg as it is encoded; later
+    requests are served from the transcode cache like a normal file.
+    """
+    profile = request.args.get('profile')
+    if profile and profile not in TRANSCODE_PROFILES:
+        return jsonify({'success': False, 'message': f'Unknown profile. Available: {", ".join(TRANSCODE_PROFILES)}'}), 400
+
     try:
-        with session_scope() as session:
-            song = session.get(Song, id)
-            if song:
-                actual_filename = find_actual_file(song.filename)
-                return send_file(os.path.join(BASE_DIR, actual_filename))
+        path, st = resolve_stream_file(id)
+        if path is None:
             return jsonify({'success': False, 'message': 'Song not found'}), 404
+
+        if profile:
+            cache_path = transcode_cache_path(id, st, profile)
+            try:
+                cached_st = os.stat(cache_path)
+                # Mark as recently served for LRU eviction; mtime (and so the ETag) stays put
+                os.utime(cache_path, (time.time(), cached_st.st_mtime))
+                path, st = cache_path, cached_st
+            except FileNotFoundError:
+                logger.info(f"Transcoding song {id} for profile {profile}")
+                try:
+                    process, first_chunk = start_transcode(path, profile)
+                except (OSError, RuntimeError) as e:
+                    logger.error(f"Could not transcode song {id} ({profile}): {e}")
+                    return jsonify({'success': False, 'message': 'Transcoding failed'}), 500
+                response = app.response_class(
+                    stream_transcode(process, first_chunk, path, cache_path, profile),
+                    mimetype=TRANSCODE_PROFILES[profile]['mimetype']
+                )
+                # Also covers a response closed before the body was ever iterated
+                response.call_on_close(lambda: stop_transcode(process))
+                response.headers['Accept-Ranges'] = 'none'
+                response.cache_control.no_store = True
+                return response
+
+        # Strong validator: a file is only ever replaced, never edited in place
+        etag = f"{st.st_size:x}-{st.st_mtime_ns:x}"
+        response = send_file(
+            path,
+            mimetype=TRANSCODE_PROFILES[profile]['mimetype'] if profile else None,
+            conditional=True,
+            etag=etag,
+            max_age=STREAM_MAX_AGE,
+            last_modified=st.st_mtime
+        )
+        response.cache_control.public = False
+        response.cache_control.private = True
+        return response
     except Exception as e:
         logger.error(f"Error streaming song {id}: {e}")
         return jsonify({'success': False, 'message': 'Error streaming file'}), 500
@@ -2026,7 +3959,7 @@ def handle_volume(data):
         percent_value = int(float(vol))
         percent_value = max(0, min(100, percent_value))
         volume = percent_value / 100.0
-        pygame.mixer.music.set_volume(volume)
+        set_music_volume(song_volume())
         emit('volume_updated', {'volume': percent_value}, broadcast=True)
     except (ValueError, TypeError) as e:
         logger.error(f"Invalid volume value: {data}")
@@ -2035,6 +3968,99 @@ def handle_volume(data):
         logger.error(f"Error setting volume: {e}")
         emit('error', {'message': 'Error setting volume'})
 
+def plan_song_moves(session, moves):
+    """Compute new position keys for a reorder diff.
+
+    Each move is {id, prev_id, next_id} describing the song's new neighbours
+    (None at either end of the list). Moves are applied in order, so a later
+    move may use an earlier moved song as its neighbour. With one neighbour
+    the other side is the adjacent song across all categories, since the
+    client may only see a filtered list. Returns a list of
+    {'song_id', 'new_position'} rows, or None if two neighbours have no free
+    key between them and the positions need compacting first.
+    """
+    neighbour_ids = {m.get(key) for m in moves for key in ('prev_id', 'next_id')} - {None}
+    known = {}
+    if neighbour_ids:
+        known = dict(session.query(Song.id, Song.position).filter(Song.id.in_(neighbour_ids)).all())
+
+    updates = {}
+    for move in moves:
+        song_id = move.get('id')
+        prev_pos = known.get(move.get('prev_id'))
+        next_pos = known.get(move.get('next_id'))
+        if song_id is None or (prev_pos is None and next_pos is None):
+            continue
+
+        if prev_pos is None:
+            prev_pos = adjacent_position(session, next_pos, song_id, updates, before=True)
+        elif next_pos is None:
+            next_pos = adjacent_position(session, prev_pos, song_id, updates, before=False)
+
+        if prev_pos is None:
+            new_position = next_pos - POSITION_GAP
+        elif next_pos is None:
+            new_position = prev_pos + POSITION_GAP
+        else:
+            if next_pos - prev_pos < 2:
+                return None
+            new_position = (prev_pos + next_pos) // 2
+
+        known[song_id] = new_position
+        updates[song_id] = new_position
+
+    return [{'song_id': song_id, 'new_position': position} for song_id, position in updates.items()]
+
+def parse_song_moves(moves):
+    """Validate a reorder diff: a list of {id, prev_id, next_id} with integer ids. Raises ValueError."""
+    if not isinstance(moves, list):
+        raise ValueError('moves must be a list')
+    for move in moves:
+        if not isinstance(move, dict):
+            raise ValueError('Each move must be an object')
+        for key in ('id', 'prev_id', 'next_id'):
+            value = move.get(key)
+            if key != 'id' and value is None:
+                continue
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f"{key} must be an integer" + ('' if key == 'id' else ' or null'))
+    return moves
+
+def adjacent_position(session, position, song_id, updates, before):
+    """Nearest key before or after position, counting planned moves and skipping song_id"""
+    moved = set(updates) | {song_id}
+    query = session.query(Song.position).filter(Song.id.notin_(moved))
+    if before:
+        query = query.filter(Song.position < position).order_by(Song.position.desc())
+    else:
+        query = query.filter(Song.position > position).order_by(Song.position.asc())
+    candidates = [p for p in updates.values() if (p < position if before else p > position)]
+    row = query.first()
+    if row is not None and row.position is not None:
+        candidates.append(row.position)
+    if not candidates:
+        return None
+    return max(candidates) if before else min(candidates)
+
+def unknown_move_ids(session, moves):
+    """Song and neighbour ids in a reorder diff that match no song"""
+    ids = {m.get(key) for m in moves for key in ('id', 'prev_id', 'next_id')} - {None}
+    if not ids:
+        return set()
+    return ids - {row.id for row in session.query(Song.id).filter(Song.id.in_(ids))}
+
+def write_song_positions(session, rows):
+    """Apply {'song_id', 'new_position'} rows as one executemany UPDATE"""
+    if not rows:
+        return
+    song_table = Song.__table__
+    session.execute(
+        song_table.update()
+        .where(song_table.c.id == db.bindparam('song_id'))
+        .values(position=db.bindparam('new_position')),
+        rows
+    )
+
 @app.route('/update-song-order', methods=['POST'])
 @login_required
 @csrf.exempt
@@ -2044,17 +4070,38 @@ def update_song_order():
         if not data:
             return jsonify({'success': False, 'message': 'No data provided'}), 400
         
-        # Support both 'songs' array and 'song_ids' array formats
+        # Support 'moves' diff, 'songs' array and 'song_ids' array formats
+        moves = data.get('moves')
         song_order = data.get('songs')
         song_ids = data.get('song_ids')
         
+        if moves:
+            # Diff format: only the moved songs with their new neighbours
+            try:
+                parse_song_moves(moves)
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+            with session_scope() as session:
+                unknown = unknown_move_ids(session, moves)
+            if unknown:
+                return jsonify({'success': False, 'message': f"Unknown song ids: {sorted(unknown, key=str)}"}), 400
+            for _ in range(2):
+                with session_scope() as session:
+                    rows = plan_song_moves(session, moves)
+                    if rows is not None:
+                        write_song_positions(session, rows)
+                        return jsonify({'success': True, 'updated': len(rows)})
+                # Neighbour keys are adjacent: spread them out and retry once
+                compact_song_positions()
+            return jsonify({'success': False, 'message': 'Could not apply song order'}), 409
+        
         if song_ids:
-            # React frontend sends song_ids as array of IDs in new order
+            # Full list of IDs in new order
             with session_scope() as session:
-                for position, song_id in enumerate(song_ids):
-                    song = session.get(Song, song_id)
-                    if song:
-                        song.position = position
+                write_song_positions(session, [
+                    {'song_id': song_id, 'new_position': position * POSITION_GAP}
+                    for position, song_id in enumerate(song_ids)
+                ])
             return jsonify({'success': True})
         
         if not song_order:
@@ -2063,16 +4110,11 @@ def update_song_order():
         # Original format: List of {id: song_id, position: new_position}
         
         with session_scope() as session:
-            for item in song_order:
-                song_id = item.get('id')
-                position = item.get('position')
-                
-                if song_id is None or position is None:
-                    continue
-                    
-                song = session.get(Song, song_id)
-                if song:
-                    song.position = position
+            write_song_positions(session, [
+                {'song_id': item['id'], 'new_position': item['position']}
+                for item in song_order
+                if item.get('id') is not None and item.get('position') is not None
+            ])
             
             return jsonify({'success': True})
             
@@ -2091,9 +4133,9 @@ def reset_song_positions():
                 Song.last_played_at.asc()
             ).all()
             
-            # Reassign positions starting from 0
+            # Reassign evenly spaced positions
             for i, song in enumerate(songs):
-                song.position = i
+                song.position = i * POSITION_GAP
                 
             logger.info(f"Reset positions for {len(songs)} songs")
             return True
@@ -2142,36 +4184,18 @@ def handle_sort_unplayed_first():
                 
                 # Update position for all songs
                 for index, song in enumerate(sorted_songs):
-                    song.position = index
+                    song.position = index * POSITION_GAP
                 
                 logger.info(f"Sorted {len(unplayed_songs)} unplayed songs to top, {len(played_songs)} played songs to bottom")
-                
-                # Prepare song data for frontend
-                songs_data = []
-                for song in sorted_songs:
-                    songs_data.append({
-                        'id': song.id,
-                        'title': song.title,
-                        'source': song.source,
-                        'duration': song.duration,
-                        'position': song.position,
-                        'category': song.category or 'music',
-                        'delete_after_play': song.delete_after_play or False,
-                        'last_played_at': song.last_played_at.isoformat() if song.last_played_at else None,
-                        'priority': song.priority,
-                        'created_at': song.created_at.isoformat() if song.created_at else None,
-                        'file_path': song.filename,
-                        'duration_formatted': f"{song.duration//60}:{song.duration%60:02d}"
-                    })
-                
-                # Emit success with new song order
-                emit('sort_completed', {
-                    'success': True,
-                    'message': f'Moved {len(unplayed_songs)} unplayed songs to top',
-                    'unplayed_count': len(unplayed_songs),
-                    'played_count': len(played_songs),
-                    'songs': songs_data
-                })
+                unplayed_count, played_count = len(unplayed_songs), len(played_songs)
+
+        # Emitted after commit; clients reload their first page from /api/songs
+        emit('sort_completed', {
+            'success': True,
+            'message': f'Moved {unplayed_count} unplayed songs to top',
+            'unplayed_count': unplayed_count,
+            'played_count': played_count
+        })
                 
     except Exception as e:
         logger.error(f"Error sorting unplayed songs first: {e}")
@@ -2185,18 +4209,31 @@ def handle_sort_unplayed_first():
 def disk_usage_api():
     """API endpoint to get disk usage information"""
     try:
-        disk_info = get_disk_usage()
-        return jsonify({
-            'used': disk_info.get('used_gb', 0) * 1024 * 1024 * 1024,
-            'total': disk_info.get('total_gb', 0) * 1024 * 1024 * 1024,
-            'percent': disk_info.get('percentage_used', 0),
-            'used_formatted': f"{disk_info.get('used_gb', 0):.2f} GB",
-            'total_formatted': f"{disk_info.get('total_gb', 0):.2f} GB"
-        })
+        return jsonify(format_disk_usage(get_system_stats()))
     except Exception as e:
         logger.error(f"Error getting disk usage: {e}")
         return jsonify({'success': False, 'message': 'Error retrieving disk space information'}), 500
 
+@app.route('/api/stats')
+@login_required
+def system_stats_api():
+    """Cached disk usage and library stats snapshot"""
+    stats = get_system_stats()
+    response = jsonify(dict(stats, age_seconds=round(time.time() - stats['updated_at'], 1)))
+    response.cache_control.private = True
+    response.cache_control.max_age = STATS_MAX_AGE
+    return response
+
+@app.route('/api/event-loop-stats')
+@login_required
+def event_loop_stats_api():
+    """Event loop stall metrics, to verify blocking work stays off the hub"""
+    try:
+        return jsonify({'success': True, 'data': dict(event_loop_stats)})
+    except Exception as e:
+        logger.error(f"Error getting event loop stats: {e}")
+        return jsonify({'success': False, 'message': 'Error retrieving event loop stats'}), 500
+
 @app.route('/get-download-state')
 @login_required
 def get_download_state_api():
@@ -2299,10 +4336,20 @@ def list_scheduler_jobs():
 
 with app.app_context():
     db.create_all()
+    run_migrations()
+    build_file_index()
+    load_shuffle_bags()
     init_scheduler()
     init_admin_user()
     schedule_music()
     list_scheduler_jobs()
+    request_position_compaction()  # Spread out keys from older, densely numbered databases
+    resume_interrupted_download_jobs()
+    start_download_worker()
+    start_event_loop_probe()
+    prune_transcode_cache()
+    socketio.start_background_task(backfill_song_durations)
+    start_loudness_worker()
 
 if __name__ == '__main__':
     # For development only - in production use Gunicorn with eventlet
@@ -0,0 +1,75 @@
+"""CPU cost of one crossfade transition: decode of both sides plus the NumPy mix.
+
+Usage: python3 benchmark_crossfade.py [OUTGOING INCOMING] [--durations 2 5 10] [--runs N]
+                                     [--frequency HZ] [--channels N]
+
+With two audio files, each transition decodes the outgoing tail and the
+incoming head with ffmpeg (as app.py does) and mixes them; without files,
+random PCM stands in and only the mix is measured. Reported per fade
+duration: mean and maximum CPU time of this process and its ffmpeg
+children, and wall time. Run it on the Pi to get the numbers that matter,
+with --frequency/--channels set to the format the Pi's mixer actually
+granted (app.py logs it; often 48000 Hz), since app.py decodes at that
+format.
+"""
+import argparse
+import os
+import resource
+import time
+
+import numpy as np
+
+from helpers import CROSSFADE_DECODE_MARGIN, MIXER_CHANNELS, MIXER_FREQUENCY, decode_pcm, mix_crossfade
+
+def cpu_seconds():
+    """CPU time of this process plus reaped children (the ffmpeg decoders)"""
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+def synthetic_pcm(duration, frequency, channels, rng):
+    """Random outgoing tail and incoming head standing in for decoded audio"""
+    frames = int(round(duration * frequency))
+    margin = int(CROSSFADE_DECODE_MARGIN * frequency)
+    tail = rng.integers(-20000, 20000, size=(frames + margin, channels), dtype=np.int16)
+    head = rng.integers(-20000, 20000, size=(frames, channels), dtype=np.int16)
+    return tail, head
+
+def transition(args, duration, pcm):
+    if args.files:
+        outgoing_path, incoming_path = args.files
+        tail = decode_pcm(outgoing_path, 30.0, duration + CROSSFADE_DECODE_MARGIN, args.frequency, args.channels)
+        head = decode_pcm(incoming_path, 0, duration, args.frequency, args.channels)
+    else:
+        tail, head = pcm
+    skip = len(tail) - len(head)
+    return mix_crossfade(tail[skip:], head, 0.8, 0.8)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='*', help='OUTGOING and INCOMING audio files (optional)')
+    parser.add_argument('--durations', type=float, nargs='+', default=[2, 5, 10])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--frequency', type=int, default=MIXER_FREQUENCY, help='mixer sample rate to decode at')
+    parser.add_argument('--channels', type=int, default=MIXER_CHANNELS, choices=(1, 2))
+    args = parser.parse_args()
+    if args.files and (len(args.files) != 2 or not all(os.path.exists(f) for f in args.files)):
+        parser.error('give exactly two existing audio files, or none')
+
+    rng = np.random.default_rng(0)
+    print(f"{'decode + mix' if args.files else 'mix only (synthetic PCM)'} at {args.frequency} Hz, "
+          f"{args.channels} channel(s), {args.runs} runs per duration")
+    for duration in args.durations:
+        pcm = None if args.files else synthetic_pcm(duration, args.frequency, args.channels, rng)
+        transition(args, duration, pcm)  # Warm up
+        cpu, wall = [], []
+        for _ in range(args.runs):
+            cpu_start, wall_start = cpu_seconds(), time.perf_counter()
+            transition(args, duration, pcm)
+            cpu.append(cpu_seconds() - cpu_start)
+            wall.append(time.perf_counter() - wall_start)
+        print(f"{duration:5.1f}s fade  CPU mean {sum(cpu) / len(cpu) * 1000:7.1f} ms  max {max(cpu) * 1000:7.1f} ms  "
+              f"wall mean {sum(wall) / len(wall) * 1000:7.1f} ms  max {max(wall) * 1000:7.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Per-track wall time of the YouTube download path: two-pass (before) vs single-pass (after).
+
+Usage: python3 benchmark_download.py URL [URL ...]
+
+Each URL is downloaded into a temporary directory twice, once per strategy,
+and the per-track wall time is printed. The single pass is app.py's: a
+YoutubeDL per track, built from the same options and resolved with the same
+helper. Needs network access and FFmpeg. Does not touch music.db or the
+music folder.
+"""
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import yt_dlp
+
+from helpers import download_options, resolve_track_info
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+POSTPROCESSORS = [{
+    'key': 'FFmpegExtractAudio',
+    'preferredcodec': 'mp3',
+    'preferredquality': '192',
+}]
+
+def two_pass(url, out_dir):
+    """Previous behaviour: one YoutubeDL to extract info, a second one to download"""
+    with yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True}) as ydl:
+        info = ydl.extract_info(url, download=False)
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'outtmpl': os.path.join(out_dir, 'two_pass_%(id)s.%(ext)s'),
+        'postprocessors': POSTPROCESSORS,
+        'quiet': True,
+        'no_warnings': True
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        ydl.download([url])
+    return info.get('title')
+
+def single_pass(url, out_dir):
+    """Current behaviour: a YoutubeDL for the track, extract once and download from that result"""
+    with yt_dlp.YoutubeDL(download_options(out_dir)) as ydl:
+        info = resolve_track_info(ydl, url)
+        info['normalized_title'] = f"single_pass_{info.get('id')}"
+        ydl.process_ie_result(info, download=True)
+    return info.get('title')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('urls', nargs='+', help='YouTube video URLs')
+    args = parser.parse_args()
+
+    out_dir = tempfile.mkdtemp(prefix='music-scheduler-bench-')
+    try:
+        before = []
+        for url in args.urls:
+            start = time.perf_counter()
+            title = two_pass(url, out_dir)
+            before.append(time.perf_counter() - start)
+            logger.info(f"two-pass    {before[-1]:6.2f}s  {title}")
+
+        after = []
+        for url in args.urls:
+            start = time.perf_counter()
+            title = single_pass(url, out_dir)
+            after.append(time.perf_counter() - start)
+            logger.info(f"single-pass {after[-1]:6.2f}s  {title}")
+
+        mean_before = sum(before) / len(before)
+        mean_after = sum(after) / len(after)
+        print(f"\nTracks: {len(args.urls)}")
+        print(f"Two-pass mean per track:    {mean_before:.2f}s")
+        print(f"Single-pass mean per track: {mean_after:.2f}s")
+        print(f"Saved per track:            {mean_before - mean_after:.2f}s ({(1 - mean_after / mean_before) * 100:.0f}%)")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
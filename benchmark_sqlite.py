@@ -0,0 +1,119 @@
+"""Concurrent read/write throughput of music.db's access pattern per SQLite profile.
+
+Usage: python3 benchmark_sqlite.py [--songs N] [--readers N] [--writers N] [--seconds S]
+
+For each profile a fresh song table is created in a temporary directory.
+Reader threads run the next-song query while writer threads move songs and
+stamp last_played_at, like play_music() and playlist imports do. Reported
+are operations per second and how many writes failed with "database is
+locked". Does not touch music.db. The profiles are app.py's SQLITE_PROFILES.
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from helpers import SQLITE_PROFILES, SQLITE_TIMEOUT
+
+NEXT_SONG_QUERY = """
+    SELECT id FROM song WHERE category = ?
+    ORDER BY position ASC, last_played_at IS NULL DESC, priority DESC, last_played_at ASC
+    LIMIT 1
+"""
+
+def connect(db_path, pragmas):
+    # The engine's connect timeout, so both profiles wait on locks the same way
+    connection = sqlite3.connect(db_path, timeout=SQLITE_TIMEOUT, check_same_thread=False)
+    for name, value in pragmas.items():
+        connection.execute(f"PRAGMA {name} = {value}")
+    return connection
+
+def create_songs(db_path, pragmas, songs):
+    connection = connect(db_path, pragmas)
+    connection.executescript("""
+        CREATE TABLE song (
+            id INTEGER PRIMARY KEY,
+            title VARCHAR(200) NOT NULL,
+            filename VARCHAR(200) NOT NULL UNIQUE,
+            priority INTEGER DEFAULT 0,
+            position INTEGER DEFAULT 0,
+            category VARCHAR(20) DEFAULT 'music',
+            last_played_at DATETIME
+        );
+        CREATE INDEX ix_song_category_playlist_order
+            ON song (category, position, last_played_at IS NULL DESC, priority DESC, last_played_at);
+    """)
+    connection.executemany(
+        "INSERT INTO song (title, filename, position, category) VALUES (?, ?, ?, ?)",
+        [(f"Song {i}", f"song_{i}.mp3", i * 1024, 'announcement' if i % 10 == 0 else 'music') for i in range(songs)]
+    )
+    connection.commit()
+    connection.close()
+
+def reader(db_path, pragmas, stop, counts):
+    connection = connect(db_path, pragmas)
+    while not stop.is_set():
+        try:
+            connection.execute(NEXT_SONG_QUERY, (random.choice(('music', 'announcement')),)).fetchone()
+            counts['reads'] += 1
+        except sqlite3.OperationalError:
+            counts['read_errors'] += 1
+    connection.close()
+
+def writer(db_path, pragmas, songs, stop, counts):
+    connection = connect(db_path, pragmas)
+    while not stop.is_set():
+        try:
+            song_id = random.randint(1, songs)
+            connection.execute(
+                "UPDATE song SET position = (SELECT MAX(position) FROM song) + 1024, last_played_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (song_id,)
+            )
+            connection.commit()
+            counts['writes'] += 1
+        except sqlite3.OperationalError:
+            connection.rollback()
+            counts['write_errors'] += 1
+    connection.close()
+
+def run_profile(name, pragmas, args, work_dir):
+    db_path = os.path.join(work_dir, f"{name}.db")
+    create_songs(db_path, pragmas, args.songs)
+
+    stop = threading.Event()
+    counts = {'reads': 0, 'read_errors': 0, 'writes': 0, 'write_errors': 0}
+    threads = [threading.Thread(target=reader, args=(db_path, pragmas, stop, counts)) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(db_path, pragmas, args.songs, stop, counts)) for _ in range(args.writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:8} reads/s {counts['reads'] / elapsed:9.0f}  writes/s {counts['writes'] / elapsed:7.0f}  "
+          f"locked reads {counts['read_errors']:6}  locked writes {counts['write_errors']:6}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--songs', type=int, default=2000)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='music-scheduler-sqlite-bench-')
+    try:
+        for name, pragmas in SQLITE_PROFILES.items():
+            run_profile(name, pragmas, args, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Concurrent listener load on /stream/<id> of a running instance.
+
+Usage: python3 benchmark_stream.py SONG_ID [--url http://pi:5000] [--listeners N] [--seconds S]
+
+Logs in once, then each listener thread loops like a browser audio element
+that seeks: a Range request for a random 256KB slice, and every tenth
+request a conditional full-file request with If-None-Match. Reports
+requests per second, bytes per second, latency percentiles and how many
+responses were 206 / 304 / 200. Run it against the Pi under gunicorn's
+eventlet worker, as deployed.
+"""
+import argparse
+import getpass
+import http.cookiejar
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+SLICE_BYTES = 256 * 1024
+
+def login(base_url, username, password):
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    request = urllib.request.Request(
+        f"{base_url}/api/login",
+        data=json.dumps({'username': username, 'password': password}).encode(),
+        headers={'Content-Type': 'application/json'}
+    )
+    opener.open(request).read()
+    return jar
+
+def fetch(opener, url, headers):
+    """(status, body bytes, etag) for one GET; 304 comes back as an HTTPError"""
+    try:
+        with opener.open(urllib.request.Request(url, headers=headers)) as response:
+            body = response.read()
+            return response.status, len(body), response.headers.get('ETag'), response.headers.get('Content-Range')
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return 304, 0, None, None
+        raise
+
+def listener(jar, url, size, stop, results):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    etag = None
+    n = 0
+    while not stop.is_set():
+        n += 1
+        if n % 10 == 0 and etag:
+            headers = {'If-None-Match': etag}
+        else:
+            start = random.randrange(0, max(1, size - SLICE_BYTES))
+            headers = {'Range': f"bytes={start}-{start + SLICE_BYTES - 1}"}
+        began = time.perf_counter()
+        try:
+            status, nbytes, new_etag, _ = fetch(opener, url, headers)
+        except Exception:
+            results['errors'] += 1
+            continue
+        results['latencies'].append(time.perf_counter() - began)
+        results['bytes'] += nbytes
+        results[status] = results.get(status, 0) + 1
+        etag = new_etag or etag
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('song_id', type=int)
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--listeners', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=15)
+    args = parser.parse_args()
+
+    jar = login(args.url, args.username, getpass.getpass(f"Password for {args.username}: "))
+    url = f"{args.url}/stream/{args.song_id}"
+
+    # Learn the file size from a one-byte range
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    status, _, _, content_range = fetch(opener, url, {'Range': 'bytes=0-0'})
+    if status != 206 or not content_range:
+        raise SystemExit(f"Server did not answer a Range request with 206 (got {status})")
+    size = int(content_range.rsplit('/', 1)[1])
+
+    stop = threading.Event()
+    results = {'latencies': [], 'bytes': 0, 'errors': 0}
+    threads = [threading.Thread(target=listener, args=(jar, url, size, stop, results)) for _ in range(args.listeners)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(results['latencies'])
+    if not latencies:
+        raise SystemExit(f"No successful requests ({results['errors']} errors)")
+    p50 = latencies[len(latencies) // 2]
+    p95 = latencies[int(len(latencies) * 0.95)]
+    print(f"Listeners: {args.listeners}, file size: {size / 1024 / 1024:.1f} MB")
+    print(f"Requests/s: {len(latencies) / elapsed:.1f}   MB/s: {results['bytes'] / elapsed / 1024 / 1024:.1f}")
+    print(f"Latency p50: {p50 * 1000:.0f} ms   p95: {p95 * 1000:.0f} ms")
+    print(f"206: {results.get(206, 0)}   304: {results.get(304, 0)}   200: {results.get(200, 0)}   errors: {results['errors']}")
+
+if __name__ == "__main__":
+    main()
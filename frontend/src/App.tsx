@@ -13,7 +13,7 @@ function App() {
   const [isLoading, setIsLoading] = useState(true);
   const [isAuthenticated, setIsAuthenticated] = useState(false);
   const [username, setUsername] = useState('');
-  const { setSongs, setSchedules, setPlaybackState, setNextSchedule, setSettings, reconnectSocket } = useSocket();
+  const { setSongs, setSongsCursor, setSongCounts, setSchedules, setPlaybackState, setNextSchedule, setSettings, reconnectSocket } = useSocket();
   const { addToast } = useToast();
 
   // Load initial state on mount
@@ -28,6 +28,8 @@ function App() {
         
         if (data.is_authenticated) {
           setSongs(data.songs);
+          setSongsCursor(data.songs_next_cursor);
+          setSongCounts(data.song_counts);
           setSchedules(data.schedules);
           setNextSchedule(data.next_schedule);
           setPlaybackState({
@@ -51,7 +53,7 @@ function App() {
     };
 
     loadInitialState();
-  }, [setSongs, setSchedules, setPlaybackState, setSettings]);
+  }, [setSongs, setSongsCursor, setSongCounts, setSchedules, setPlaybackState, setSettings]);
 
   const handleLogin = async (loginUsername: string, password: string) => {
     try {
@@ -66,6 +68,8 @@ function App() {
       const response = await authApi.getInitialState();
       const data: InitialState = response.data;
       setSongs(data.songs);
+      setSongsCursor(data.songs_next_cursor);
+      setSongCounts(data.song_counts);
       setSchedules(data.schedules);
       setNextSchedule(data.next_schedule);
       setPlaybackState({
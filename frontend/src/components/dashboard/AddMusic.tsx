@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { 
   Youtube, 
@@ -11,29 +11,58 @@ import {
   Music
 } from 'lucide-react';
 import { useToast } from '@/contexts/ToastContext';
+import { useSocket } from '@/contexts/SocketContext';
 import { Button, Card, Input } from '@/components/ui';
 import { musicApi } from '@/lib/api';
+import type { DownloadJob } from '@/types';
 
 export function AddMusic() {
   const { addToast } = useToast();
+  const { socket } = useSocket();
   const [isExpanded, setIsExpanded] = useState(true);
   const [activeTab, setActiveTab] = useState<'youtube' | 'upload'>('youtube');
   
   // YouTube state
   const [youtubeUrl, setYoutubeUrl] = useState('');
   const [isAddingYoutube, setIsAddingYoutube] = useState(false);
+  const pendingJobs = useRef(new Set<number>());
   
   // Upload state
   const [selectedFile, setSelectedFile] = useState<File | null>(null);
   const [isUploading, setIsUploading] = useState(false);
 
+  // Downloads run in a background queue; report the outcome of jobs queued from this tab
+  useEffect(() => {
+    if (!socket) return;
+    const handleJobUpdate = (job: DownloadJob) => {
+      if (!pendingJobs.current.has(job.id)) return;
+      if (job.status === 'completed') {
+        addToast('success', job.message || 'Đã tải nhạc xong');
+      } else if (job.status === 'failed') {
+        addToast('error', job.message || 'Không thể tải nhạc');
+      } else if (job.status === 'cancelled') {
+        addToast('info', job.message || 'Đã hủy tải xuống');
+      } else {
+        return;
+      }
+      pendingJobs.current.delete(job.id);
+    };
+    socket.on('download_job_update', handleJobUpdate);
+    return () => {
+      socket.off('download_job_update', handleJobUpdate);
+    };
+  }, [socket, addToast]);
+
   const handleYoutubeSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     if (!youtubeUrl.trim()) return;
 
     setIsAddingYoutube(true);
     try {
-      await musicApi.addFromYoutube(youtubeUrl);
+      const response = await musicApi.addFromYoutube(youtubeUrl);
+      if (response.data.job_id) {
+        pendingJobs.current.add(response.data.job_id);
+      }
       addToast('success', 'Đang tải nhạc từ YouTube...');
       setYoutubeUrl('');
     } catch (error: any) {
@@ -71,6 +71,12 @@ export function DiskUsage({ diskUsage, onRefresh }: DiskUsageProps) {
         <p className="text-xs text-center font-medium">
           {diskUsage.percent.toFixed(1)}% đã sử dụng
         </p>
+
+        {diskUsage.library_formatted && (
+          <p className="text-xs text-center text-muted-foreground">
+            Thư viện nhạc: {diskUsage.library_formatted}
+          </p>
+        )}
       </div>
     </Card>
   );
@@ -7,7 +7,7 @@ import { musicApi } from '@/lib/api';
 import { useState, useRef, useEffect } from 'react';
 
 export function Player() {
-  const { playbackState, togglePlayPause, stopMusic, setVolume, settings, toggleShuffle, toggleFade, setFadeDuration } = useSocket();
+  const { playbackState, togglePlayPause, stopMusic, setVolume, settings, toggleShuffle, setSelectionMode, toggleFade, toggleCrossfade, setFadeDuration } = useSocket();
   const [localVolume, setLocalVolume] = useState(playbackState.volume);
   const [isMuted, setIsMuted] = useState(false);
   const [previousVolume, setPreviousVolume] = useState(100);
@@ -179,6 +179,26 @@ export function Player() {
                       </button>
                     </div>
 
+                    {/* Weighted Mode */}
+                    <div className="flex items-center justify-between py-3 border-b border-border">
+                      <div className="flex-1 min-w-0 mr-3">
+                        <p className="text-sm font-medium">Theo độ ưu tiên</p>
+                        <p className="text-xs text-muted-foreground">Bài ưu tiên cao phát thường hơn</p>
+                      </div>
+                      <button
+                        onClick={() => setSelectionMode(settings.selection_mode === 'weighted' ? 'playlist' : 'weighted')}
+                        className={`relative flex-shrink-0 w-11 h-6 rounded-full transition-colors duration-200 ${
+                          settings.selection_mode === 'weighted' ? 'bg-primary' : 'bg-muted-foreground/30'
+                        }`}
+                      >
+                        <span
+                          className={`absolute top-1 left-1 w-4 h-4 rounded-full bg-white shadow-md transition-transform duration-200 ${
+                            settings.selection_mode === 'weighted' ? 'translate-x-5' : 'translate-x-0'
+                          }`}
+                        />
+                      </button>
+                    </div>
+
                     {/* Fade In/Out */}
                     <div className="flex items-center justify-between py-3 border-b border-border">
                       <div className="flex-1 min-w-0 mr-3">
@@ -224,6 +244,24 @@ export function Player() {
                               />
                             </div>
                           </div>
+                          <div className="flex items-center justify-between pt-3">
+                            <div className="flex-1 min-w-0 mr-3">
+                              <p className="text-sm">Crossfade</p>
+                              <p className="text-xs text-muted-foreground">Chồng hai bài, không có khoảng lặng</p>
+                            </div>
+                            <button
+                              onClick={toggleCrossfade}
+                              className={`relative flex-shrink-0 w-11 h-6 rounded-full transition-colors duration-200 ${
+                                settings.crossfade_enabled ? 'bg-primary' : 'bg-muted-foreground/30'
+                              }`}
+                            >
+                              <span
+                                className={`absolute top-1 left-1 w-4 h-4 rounded-full bg-white shadow-md transition-transform duration-200 ${
+                                  settings.crossfade_enabled ? 'translate-x-5' : 'translate-x-0'
+                                }`}
+                              />
+                            </button>
+                          </div>
                         </motion.div>
                       )}
                     </AnimatePresence>
@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { motion, AnimatePresence, Reorder, useDragControls } from 'framer-motion';
 import { 
   Music, 
@@ -11,21 +11,80 @@ import {
   ArrowUpDown,
   Megaphone,
   ChevronDown,
+  Star,
   Trash
 } from 'lucide-react';
 import { useSocket } from '@/contexts/SocketContext';
 import { useToast } from '@/contexts/ToastContext';
-import { Button, Card } from '@/components/ui';
+import { Button, Card, Spinner } from '@/components/ui';
 import { musicApi } from '@/lib/api';
-import { formatDuration } from '@/lib/utils';
-import type { Song, SongCategory } from '@/types';
+import { formatDuration, diffSongOrder } from '@/lib/utils';
+import type { Song, SongCategory, SongPage } from '@/types';
 
 export function Playlist() {
-  const { songs, setSongs, playbackState, sortUnplayedFirst } = useSocket();
+  const {
+    songs,
+    setSongs,
+    songsCursor,
+    setSongsCursor,
+    songCounts,
+    setSongCounts,
+    songsReloadKey,
+    playbackState,
+    sortUnplayedFirst,
+  } = useSocket();
   const { addToast } = useToast();
   const [deletingId, setDeletingId] = useState<number | null>(null);
   const [playingId, setPlayingId] = useState<number | null>(null);
   const [filterCategory, setFilterCategory] = useState<SongCategory | 'all'>('all');
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
+  // Initial state already delivered the first unfiltered page
+  const skipInitialLoad = useRef(true);
+
+  const loadSongs = async (cursor: string | null) => {
+    setIsLoadingMore(true);
+    try {
+      const response = await musicApi.getSongs({ category: filterCategory, cursor });
+      const page: SongPage = response.data;
+      setSongs((prev) => (cursor ? [...prev, ...page.songs] : page.songs));
+      setSongsCursor(page.next_cursor);
+      if (page.counts) {
+        setSongCounts(page.counts);
+      }
+    } catch (error) {
+      console.error('Failed to load songs:', error);
+      addToast('error', 'Không thể tải danh sách bài hát');
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
+  // Reload the first page when the filter changes or the server reorders the library
+  useEffect(() => {
+    if (skipInitialLoad.current) {
+      skipInitialLoad.current = false;
+      return;
+    }
+    loadSongs(null);
+  }, [filterCategory, songsReloadKey]);
+
+  const handleScroll = (e: React.UIEvent<HTMLDivElement>) => {
+    const el = e.currentTarget;
+    if (songsCursor && !isLoadingMore && el.scrollTop + el.clientHeight >= el.scrollHeight - 200) {
+      loadSongs(songsCursor);
+    }
+  };
+
+  const adjustCounts = (song: Song, delta: number, category: SongCategory = song.category || 'music') => {
+    setSongCounts((prev) =>
+      prev && {
+        ...prev,
+        total: prev.total + delta,
+        [category]: prev[category] + delta,
+        [song.last_played_at ? 'played' : 'unplayed']: prev[song.last_played_at ? 'played' : 'unplayed'] + delta,
+      }
+    );
+  };
 
   const handlePlay = async (songId: number) => {
     setPlayingId(songId);
@@ -43,6 +102,8 @@ export function Playlist() {
     setDeletingId(songId);
     try {
       await musicApi.deleteSong(songId);
+      const deleted = songs.find((s) => s.id === songId);
+      if (deleted) adjustCounts(deleted, -1);
       setSongs((prev) => prev.filter((s) => s.id !== songId));
       addToast('success', 'Đã xóa bài hát');
     } catch (error) {
@@ -56,6 +117,11 @@ export function Playlist() {
   const handleCategoryChange = async (songId: number, newCategory: SongCategory) => {
     try {
       await musicApi.updateCategory(songId, newCategory);
+      const changed = songs.find((s) => s.id === songId);
+      if (changed && (changed.category || 'music') !== newCategory) {
+        adjustCounts(changed, -1);
+        adjustCounts(changed, 1, newCategory);
+      }
       setSongs((prev) =>
         prev.map((s) => (s.id === songId ? { ...s, category: newCategory } : s))
       );
@@ -66,6 +132,20 @@ export function Playlist() {
     }
   };
 
+  const handlePriorityChange = async (songId: number, priority: number) => {
+    try {
+      const response = await musicApi.updatePriority(songId, priority);
+      const newPriority = response.data.song.priority;
+      setSongs((prev) =>
+        prev.map((s) => (s.id === songId ? { ...s, priority: newPriority } : s))
+      );
+      addToast('success', `Đã đặt ưu tiên ${newPriority}`);
+    } catch (error) {
+      console.error('Failed to update priority:', error);
+      addToast('error', 'Không thể cập nhật ưu tiên');
+    }
+  };
+
   const handleToggleDeleteAfterPlay = async (songId: number) => {
     try {
       const response = await musicApi.toggleDeleteAfterPlay(songId);
@@ -81,9 +161,11 @@ export function Playlist() {
   };
 
   const handleReorder = async (newOrder: Song[]) => {
+    const moves = diffSongOrder(filteredSongs.map((s) => s.id), newOrder.map((s) => s.id));
     setSongs(newOrder);
+    if (moves.length === 0) return;
     try {
-      await musicApi.updateOrder(newOrder.map((s) => s.id));
+      await musicApi.moveSongs(moves);
     } catch (error) {
       console.error('Failed to update order:', error);
       addToast('error', 'Không thể cập nhật thứ tự');
@@ -107,9 +189,10 @@ export function Playlist() {
     ? songs 
     : songs.filter(s => (s.category || 'music') === filterCategory);
 
-  // Count by category
-  const musicCount = songs.filter(s => (s.category || 'music') === 'music').length;
-  const announcementCount = songs.filter(s => s.category === 'announcement').length;
+  // Count by category (library-wide; only a page of songs may be loaded)
+  const totalCount = songCounts?.total ?? songs.length;
+  const musicCount = songCounts?.music ?? songs.filter(s => (s.category || 'music') === 'music').length;
+  const announcementCount = songCounts?.announcement ?? songs.filter(s => s.category === 'announcement').length;
 
   return (
     <Card className="overflow-hidden">
@@ -123,7 +206,7 @@ export function Playlist() {
             <div>
               <h2 className="font-semibold">Playlist</h2>
               <p className="text-sm text-muted-foreground">
-                {songs.length} bài hát
+                {totalCount} bài hát
               </p>
             </div>
           </div>
@@ -149,7 +232,7 @@ export function Playlist() {
                 : 'bg-muted hover:bg-muted/80'
             }`}
           >
-            Tất cả ({songs.length})
+            Tất cả ({totalCount})
           </button>
           <button
             onClick={() => setFilterCategory('music')}
@@ -177,7 +260,7 @@ export function Playlist() {
       </div>
 
       {/* Song List */}
-      <div className="divide-y divide-border max-h-[600px] overflow-y-auto">
+      <div className="divide-y divide-border max-h-[600px] overflow-y-auto" onScroll={handleScroll}>
         {filteredSongs.length === 0 ? (
           <div className="p-8 text-center">
             <Music className="w-12 h-12 mx-auto text-muted-foreground/50 mb-3" />
@@ -204,6 +287,7 @@ export function Playlist() {
                   onPlay={() => handlePlay(song.id)}
                   onDelete={() => handleDelete(song.id)}
                   onCategoryChange={(cat) => handleCategoryChange(song.id, cat)}
+                  onPriorityChange={(priority) => handlePriorityChange(song.id, priority)}
                   onToggleDeleteAfterPlay={() => handleToggleDeleteAfterPlay(song.id)}
                   getSourceIcon={getSourceIcon}
                   index={index}
@@ -212,6 +296,11 @@ export function Playlist() {
             </AnimatePresence>
           </Reorder.Group>
         )}
+        {isLoadingMore && (
+          <div className="flex justify-center p-4">
+            <Spinner size="sm" />
+          </div>
+        )}
       </div>
     </Card>
   );
@@ -225,6 +314,7 @@ interface SongItemProps {
   onPlay: () => void;
   onDelete: () => void;
   onCategoryChange: (category: SongCategory) => void;
+  onPriorityChange: (priority: number) => void;
   onToggleDeleteAfterPlay: () => void;
   getSourceIcon: (source: string) => React.ReactNode;
   index: number;
@@ -238,12 +328,14 @@ function SongItem({
   onPlay,
   onDelete,
   onCategoryChange,
+  onPriorityChange,
   onToggleDeleteAfterPlay,
   getSourceIcon,
   index,
 }: SongItemProps) {
   const [showActions, setShowActions] = useState(false);
   const [showCategoryMenu, setShowCategoryMenu] = useState(false);
+  const [showPriorityMenu, setShowPriorityMenu] = useState(false);
   const dragControls = useDragControls();
 
   const categoryConfig = {
@@ -395,6 +487,49 @@ function SongItem({
         </AnimatePresence>
       </div>
 
+      {/* Priority Badge with Dropdown (0-10; higher plays more often in weighted mode) */}
+      <div className="relative shrink-0">
+        <button
+          onClick={() => setShowPriorityMenu(!showPriorityMenu)}
+          title="Ưu tiên"
+          className={`flex items-center gap-1 px-1.5 sm:px-2 py-1 rounded-md text-xs font-medium transition-colors ${
+            song.priority > 0
+              ? 'bg-yellow-500/20 text-yellow-600 dark:text-yellow-400'
+              : 'bg-muted text-muted-foreground'
+          }`}
+        >
+          <Star className="w-3 h-3" />
+          <span>{song.priority}</span>
+          <ChevronDown className="w-3 h-3" />
+        </button>
+
+        <AnimatePresence>
+          {showPriorityMenu && (
+            <motion.div
+              initial={{ opacity: 0, y: -5, scale: 0.95 }}
+              animate={{ opacity: 1, y: 0, scale: 1 }}
+              exit={{ opacity: 0, y: -5, scale: 0.95 }}
+              className="absolute right-0 top-full mt-1 z-50 bg-card border border-border rounded-lg shadow-lg overflow-hidden p-1 grid grid-cols-4 gap-1 min-w-[140px]"
+            >
+              {Array.from({ length: 11 }, (_, priority) => (
+                <button
+                  key={priority}
+                  onClick={() => {
+                    if (priority !== song.priority) onPriorityChange(priority);
+                    setShowPriorityMenu(false);
+                  }}
+                  className={`px-2 py-1.5 text-sm rounded-md hover:bg-muted transition-colors ${
+                    priority === song.priority ? 'bg-primary/10 text-primary' : ''
+                  }`}
+                >
+                  {priority}
+                </button>
+              ))}
+            </motion.div>
+          )}
+        </AnimatePresence>
+      </div>
+
       {/* Delete After Play Badge - Hidden on mobile, show icon only */}
       {song.delete_after_play && (
         <div className="flex items-center gap-1 px-1.5 sm:px-2 py-1 rounded-md text-xs font-medium bg-red-500/20 text-red-600 dark:text-red-400 shrink-0">
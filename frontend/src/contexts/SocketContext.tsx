@@ -1,6 +1,6 @@
-import React, { createContext, useContext, useEffect, useState, useCallback } from 'react';
+import React, { createContext, useContext, useEffect, useState, useCallback, useRef } from 'react';
 import { io, Socket } from 'socket.io-client';
-import type { PlaybackState, DownloadState, Song, Schedule, PlaybackSettings } from '@/types';
+import type { PlaybackState, DownloadState, Song, SongCounts, Schedule, PlaybackSettings, SelectionMode } from '@/types';
 
 interface SocketContextType {
   socket: Socket | null;
@@ -8,10 +8,15 @@ interface SocketContextType {
   playbackState: PlaybackState;
   downloadState: DownloadState;
   songs: Song[];
+  songsCursor: string | null;
+  songCounts: SongCounts | null;
+  songsReloadKey: number;
   schedules: Schedule[];
   nextSchedule: { time: string; song_title: string } | null;
   settings: PlaybackSettings;
   setSongs: React.Dispatch<React.SetStateAction<Song[]>>;
+  setSongsCursor: React.Dispatch<React.SetStateAction<string | null>>;
+  setSongCounts: React.Dispatch<React.SetStateAction<SongCounts | null>>;
   setSchedules: React.Dispatch<React.SetStateAction<Schedule[]>>;
   setPlaybackState: React.Dispatch<React.SetStateAction<PlaybackState>>;
   setNextSchedule: React.Dispatch<React.SetStateAction<{ time: string; song_title: string } | null>>;
@@ -21,7 +26,9 @@ interface SocketContextType {
   setVolume: (volume: number) => void;
   sortUnplayedFirst: () => void;
   toggleShuffle: () => void;
+  setSelectionMode: (mode: SelectionMode) => void;
   toggleFade: () => void;
+  toggleCrossfade: () => void;
   setFadeDuration: (duration: number) => void;
   reconnectSocket: () => void;
 }
@@ -44,9 +51,11 @@ const defaultDownloadState: DownloadState = {
 };
 
 const defaultSettings: PlaybackSettings = {
+  selection_mode: 'playlist',
   shuffle_mode: false,
   fade_enabled: true,
   fade_duration: 2.0,
+  crossfade_enabled: false,
 };
 
 const SocketContext = createContext<SocketContextType | null>(null);
@@ -57,10 +66,19 @@ export function SocketProvider({ children }: { children: React.ReactNode }) {
   const [playbackState, setPlaybackState] = useState<PlaybackState>(defaultPlaybackState);
   const [downloadState, setDownloadState] = useState<DownloadState>(defaultDownloadState);
   const [songs, setSongs] = useState<Song[]>([]);
+  // Cursor for the next /api/songs page; null once the whole list is loaded
+  const [songsCursor, setSongsCursor] = useState<string | null>(null);
+  const [songCounts, setSongCounts] = useState<SongCounts | null>(null);
+  // Bumped when the server reorders the library so the playlist reloads its first page
+  const [songsReloadKey, setSongsReloadKey] = useState(0);
+  const songsCursorRef = useRef<string | null>(null);
+  songsCursorRef.current = songsCursor;
   const [schedules, setSchedules] = useState<Schedule[]>([]);
   const [nextSchedule, setNextSchedule] = useState<{ time: string; song_title: string } | null>(null);
   const [settings, setSettings] = useState<PlaybackSettings>(defaultSettings);
   const [socketVersion, setSocketVersion] = useState(0);
+  // Server only sends playback_update on transitions and heartbeats; position is interpolated from this anchor
+  const positionAnchor = useRef<{ position: number; at: number }>({ position: 0, at: Date.now() });
 
   const connectSocket = useCallback(() => {
     const socketInstance = io('/', {
@@ -84,11 +102,12 @@ export function SocketProvider({ children }: { children: React.ReactNode }) {
 
     // Playback updates
     socketInstance.on('playback_update', (data: any) => {
+      positionAnchor.current = { position: data.position ?? 0, at: Date.now() };
       setPlaybackState((prev) => ({
         ...prev,
         is_playing: data.is_playing ?? prev.is_playing,
-        current_song_id: data.current_song_id ?? prev.current_song_id,
-        current_song_title: data.current_song_title ?? prev.current_song_title,
+        current_song_id: data.current_song_id !== undefined ? data.current_song_id : prev.current_song_id,
+        current_song_title: data.current_song_title !== undefined ? data.current_song_title : prev.current_song_title,
         position: data.position ?? prev.position,
         duration: data.duration ?? prev.duration,
         volume: data.volume ?? prev.volume,
@@ -108,21 +127,29 @@ export function SocketProvider({ children }: { children: React.ReactNode }) {
     });
 
     // Song finished
-    socketInstance.on('song_finished', (data: { songs?: Song[]; next_schedule?: { time: string; song_title: string } | null; deleted_song_id?: number }) => {
-      if (data.songs) {
-        setSongs(data.songs);
-      } else if (data.deleted_song_id) {
+    socketInstance.on('song_finished', (data: { next_schedule?: { time: string; song_title: string } | null; deleted_song_id?: number; counts?: SongCounts | null }) => {
+      if (data.deleted_song_id) {
         // Remove the deleted song from the list
         setSongs(prev => prev.filter(s => s.id !== data.deleted_song_id));
       }
+      if (data.counts) {
+        setSongCounts(data.counts);
+      }
       if (data.next_schedule !== undefined) {
         setNextSchedule(data.next_schedule);
       }
     });
 
     // Song added
-    socketInstance.on('song_added', (data: { song: Song; songs: Song[] }) => {
-      setSongs(data.songs);
+    socketInstance.on('song_added', (data: { song?: Song; counts?: SongCounts }) => {
+      if (data.counts) {
+        setSongCounts(data.counts);
+      }
+      // New songs go to the end of the playlist; only show it once the end is loaded
+      const song = data.song;
+      if (song && songsCursorRef.current === null) {
+        setSongs((prev) => (prev.some((s) => s.id === song.id) ? prev : [...prev, song]));
+      }
     });
 
     // Download progress
@@ -160,8 +187,8 @@ export function SocketProvider({ children }: { children: React.ReactNode }) {
     });
 
     // Sort completed
-    socketInstance.on('sort_completed', (data: { songs: Song[] }) => {
-      setSongs(data.songs);
+    socketInstance.on('sort_completed', () => {
+      setSongsReloadKey((k) => k + 1);
     });
 
     // Next schedule update
@@ -194,6 +221,19 @@ export function SocketProvider({ children }: { children: React.ReactNode }) {
     return cleanup;
   }, [connectSocket]);
 
+  // Interpolate position locally while playing
+  useEffect(() => {
+    if (!playbackState.is_playing) return;
+    const timer = setInterval(() => {
+      const { position, at } = positionAnchor.current;
+      setPlaybackState((prev) => {
+        const elapsed = position + (Date.now() - at) / 1000;
+        return { ...prev, position: prev.duration > 0 ? Math.min(elapsed, prev.duration) : elapsed };
+      });
+    }, 500);
+    return () => clearInterval(timer);
+  }, [playbackState.is_playing]);
+
   const togglePlayPause = () => {
     socket?.emit('toggle_play_pause');
   };
@@ -214,10 +254,18 @@ export function SocketProvider({ children }: { children: React.ReactNode }) {
     socket?.emit('toggle_shuffle');
   };
 
+  const setSelectionMode = (mode: SelectionMode) => {
+    socket?.emit('set_selection_mode', { mode });
+  };
+
   const toggleFade = () => {
     socket?.emit('toggle_fade');
   };
 
+  const toggleCrossfade = () => {
+    socket?.emit('toggle_crossfade');
+  };
+
   const setFadeDurationFn = (duration: number) => {
     socket?.emit('set_fade_duration', { duration });
   };
@@ -230,10 +278,15 @@ export function SocketProvider({ children }: { children: React.ReactNode }) {
         playbackState,
         downloadState,
         songs,
+        songsCursor,
+        songCounts,
+        songsReloadKey,
         schedules,
         nextSchedule,
         settings,
         setSongs,
+        setSongsCursor,
+        setSongCounts,
         setSchedules,
         setPlaybackState,
         setNextSchedule,
@@ -243,7 +296,9 @@ export function SocketProvider({ children }: { children: React.ReactNode }) {
         setVolume,
         sortUnplayedFirst,
         toggleShuffle,
+        setSelectionMode,
         toggleFade,
+        toggleCrossfade,
         setFadeDuration: setFadeDurationFn,
         reconnectSocket,
       }}
@@ -1,4 +1,5 @@
 import axios from 'axios';
+import type { SongMove } from '@/lib/utils';
 
 const api = axios.create({
   withCredentials: true,
@@ -29,6 +30,13 @@ export const authApi = {
 };
 
 export const musicApi = {
+  getSongs: (params: {
+    category?: 'music' | 'announcement' | 'all';
+    q?: string;
+    played?: boolean;
+    cursor?: string | null;
+    limit?: number;
+  }) => api.get('/api/songs', { params }),
   addFromYoutube: (url: string) => api.post('/add-music', { url }),
   uploadFile: (formData: FormData) =>
     api.post('/upload-music', formData, {
@@ -39,11 +47,18 @@ export const musicApi = {
   deleteSong: (songId: number) => api.delete(`/delete-song/${songId}`),
   updateOrder: (songIds: number[]) =>
     api.post('/update-song-order', { song_ids: songIds }),
+  moveSongs: (moves: SongMove[]) =>
+    api.post('/update-song-order', { moves }),
   resetOrder: () => api.post('/reset-playlist-order'),
   setVolume: (volume: number) => api.post('/set-volume', { volume }),
   cancelDownload: () => api.post('/cancel-download'),
+  getDownloadJobs: () => api.get('/api/download-jobs'),
+  getDownloadJob: (jobId: number) => api.get(`/api/download-jobs/${jobId}`),
+  cancelDownloadJob: (jobId: number) => api.post(`/api/download-jobs/${jobId}/cancel`),
   updateCategory: (songId: number, category: 'music' | 'announcement') =>
     api.post(`/update-song-category/${songId}`, { category }),
+  updatePriority: (songId: number, priority: number) =>
+    api.post(`/update-song-priority/${songId}`, { priority }),
   toggleDeleteAfterPlay: (songId: number) =>
     api.post(`/toggle-delete-after-play/${songId}`),
 };
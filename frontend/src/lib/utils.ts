@@ -57,3 +57,50 @@ export const WEEKDAYS = [
 ] as const;
 
 export type Weekday = (typeof WEEKDAYS)[number];
+
+export interface SongMove {
+  id: number;
+  prev_id: number | null;
+  next_id: number | null;
+}
+
+// Minimal reorder diff: songs outside the longest run that kept its relative
+// order are the ones that moved. Each move names its new previous neighbour
+// and the next neighbour that did not move, so the server can apply moves in order.
+export function diffSongOrder(oldIds: number[], newIds: number[]): SongMove[] {
+  const oldIndex = new Map(oldIds.map((id, i) => [id, i]));
+  const seq = newIds.map((id) => oldIndex.get(id) ?? -1);
+
+  const tails: number[] = [];
+  const parent: number[] = new Array(seq.length).fill(-1);
+  for (let i = 0; i < seq.length; i++) {
+    if (seq[i] < 0) continue;
+    let lo = 0;
+    let hi = tails.length;
+    while (lo < hi) {
+      const mid = (lo + hi) >> 1;
+      if (seq[tails[mid]] < seq[i]) lo = mid + 1;
+      else hi = mid;
+    }
+    if (lo > 0) parent[i] = tails[lo - 1];
+    tails[lo] = i;
+  }
+
+  const stable = new Set<number>();
+  for (let i = tails.length ? tails[tails.length - 1] : -1; i >= 0; i = parent[i]) {
+    stable.add(i);
+  }
+
+  const moves: SongMove[] = [];
+  for (let i = 0; i < newIds.length; i++) {
+    if (stable.has(i)) continue;
+    let next = i + 1;
+    while (next < newIds.length && !stable.has(next)) next++;
+    moves.push({
+      id: newIds[i],
+      prev_id: i > 0 ? newIds[i - 1] : null,
+      next_id: next < newIds.length ? newIds[next] : null,
+    });
+  }
+  return moves;
+}
@@ -1,19 +1,33 @@
 // Song category type
 export type SongCategory = 'music' | 'announcement';
 
-// Song type
+// Song type (slim playlist projection)
 export interface Song {
   id: number;
   title: string;
   duration: number;
   source: string;
-  file_path: string;
   position: number;
   category: SongCategory;
   delete_after_play: boolean;
   last_played_at: string | null;
   priority: number;
-  created_at: string;
+}
+
+// Library-wide song counts
+export interface SongCounts {
+  total: number;
+  music: number;
+  announcement: number;
+  played: number;
+  unplayed: number;
+}
+
+// One page of /api/songs
+export interface SongPage {
+  songs: Song[];
+  next_cursor: string | null;
+  counts?: SongCounts;
 }
 
 // Schedule song category type (includes 'all' option)
@@ -59,6 +73,21 @@ export interface DownloadState {
   };
 }
 
+// Queued YouTube download job
+export interface DownloadJob {
+  id: number;
+  url: string;
+  status: 'queued' | 'running' | 'completed' | 'failed' | 'cancelled';
+  message: string;
+  playlist_title: string | null;
+  total_tracks: number;
+  downloaded_tracks: number;
+  failed_tracks: number;
+  created_at: string | null;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
 // Disk usage info
 export interface DiskUsage {
   used: number;
@@ -66,18 +95,27 @@ export interface DiskUsage {
   percent: number;
   used_formatted: string;
   total_formatted: string;
+  library_bytes?: number;
+  library_formatted?: string;
 }
 
+// How scheduled playback picks the next song
+export type SelectionMode = 'playlist' | 'shuffle' | 'weighted';
+
 // Playback settings
 export interface PlaybackSettings {
+  selection_mode: SelectionMode;
   shuffle_mode: boolean;
   fade_enabled: boolean;
   fade_duration: number;
+  crossfade_enabled: boolean;
 }
 
 // Initial state from API
 export interface InitialState {
   songs: Song[];
+  songs_next_cursor: string | null;
+  song_counts: SongCounts | null;
   schedules: Schedule[];
   is_playing: boolean;
   current_song_id: number | null;
@@ -0,0 +1,83 @@
+"""Helpers shared by app.py and the benchmark_*.py scripts.
+
+Nothing here imports app: importing app starts the scheduler and the player,
+so the benchmarks import these instead and measure the same code app.py runs.
+"""
+import os
+import subprocess
+
+import numpy as np
+
+MIXER_FREQUENCY = 44100  # Requested mixer format; the device may grant another (see get_mixer_format)
+MIXER_CHANNELS = 2
+CROSSFADE_DECODE_MARGIN = 2.0  # Extra seconds of the outgoing tail decoded to cover decode time
+CROSSFADE_DECODE_TIMEOUT = 30
+
+# PRAGMAs run on every new SQLite connection, selected with SQLITE_PROFILE
+SQLITE_PROFILES = {
+    'default': {},
+    'tuned': {
+        'journal_mode': 'WAL',  # Readers no longer block on writers (or vice versa)
+        'synchronous': 'NORMAL',  # Safe with WAL; fsync at checkpoints instead of every commit
+        'busy_timeout': 5000,  # Wait up to 5s for a write lock instead of "database is locked"
+        'mmap_size': 64 * 1024 * 1024,
+        'cache_size': -8000,  # 8MB page cache
+        'temp_store': 'MEMORY'
+    }
+}
+SQLITE_TIMEOUT = 5  # sqlite3 connect timeout in seconds, for profiles without busy_timeout
+
+def decode_pcm(file_path, start, seconds, frequency, channels):
+    """Decode seconds of audio from start as an int16 (frames, channels) array at the given format.
+
+    A source that ends early is padded with silence, so the result is always
+    exactly seconds long.
+    """
+    result = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-ss', f"{start:.3f}", '-t', f"{seconds:.3f}", '-i', file_path,
+         '-vn', '-f', 's16le', '-acodec', 'pcm_s16le', '-ar', str(frequency), '-ac', str(channels), '-'],
+        capture_output=True, timeout=CROSSFADE_DECODE_TIMEOUT
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode(errors='replace').strip() or f"ffmpeg exited with {result.returncode}")
+    samples = np.frombuffer(result.stdout, dtype=np.int16)
+    wanted = int(round(seconds * frequency))
+    frames = min(len(samples) // channels, wanted)
+    pcm = np.zeros((wanted, channels), dtype=np.int16)
+    pcm[:frames] = samples[:frames * channels].reshape(frames, channels)
+    return pcm
+
+def mix_crossfade(outgoing, incoming, outgoing_gain, incoming_gain):
+    """Overlap two equal-length PCM blocks under equal-power ramps; int16 result"""
+    angle = np.linspace(0, np.pi / 2, len(incoming), dtype=np.float32)[:, None]
+    mixed = outgoing * (np.cos(angle) * outgoing_gain) + incoming * (np.sin(angle) * incoming_gain)
+    return np.clip(mixed, -32768, 32767).astype(np.int16)
+
+def download_options(out_dir, progress_hooks=()):
+    """YoutubeDL options for one track: best audio, transcoded to 192k MP3.
+
+    Files are named from the normalized_title field the caller puts in the
+    info dict before downloading.
+    """
+    return {
+        'format': 'bestaudio/best',
+        'outtmpl': os.path.join(out_dir, '%(normalized_title)s.%(ext)s'),
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'mp3',
+            'preferredquality': '192',
+        }],
+        'progress_hooks': list(progress_hooks),
+        'quiet': True,
+        'no_warnings': True
+    }
+
+def resolve_track_info(ydl, url):
+    """Extract a video's info once, ready to hand to ydl.process_ie_result(info, download=True)"""
+    # Extract without processing so the page and signatures are only resolved once per track
+    info = ydl.extract_info(url, download=False, process=False)
+    if info.get('_type') in ('url', 'url_transparent'):
+        # A redirect to another extractor has no title or duration yet; resolve it
+        # first so normalized_title is not built from a fallback
+        info = ydl.process_ie_result(info, download=False)
+    return info